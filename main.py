@@ -4,21 +4,31 @@
 # 
 #   End-to-end orchestrator for Autonomous Data Quality Guardian
 #   Handles data ingestion (CSV, DB, API, Web),
-#   performs data quality checks, drift & anomaly detection,
-#   invokes LLM reasoning, triggers alerts, and runs
-#   Great Expectations validation.
+#   performs data quality checks, auto-correction,
+#   drift & anomaly detection, invokes LLM reasoning,
+#   triggers alerts, and runs Great Expectations validation.
 # ------------------------------------------------------------
 
 from src.utils.logger import setup_logger
-from src.utils.file_handler import archive_report
+from src.utils.file_handler import archive_report, save_dataframe, timestamped_filename
 from src.utils.config_validator import validate_all_configs
+from src.utils.result_cache import ResultCache, fingerprint_frame
+from src.utils.run_history import column_null_rates, record_run_statistics
+from src.utils.stage_input import StageInput
 
 from src.ingest.ingest_manager import load_all_sources, load_thresholds
 from src.quality.data_quality_checker import calculate_quality_metrics
-from src.quality.drift_detector import detect_drift
+from src.quality.drift_detector import (
+    drift_statistics,
+    drift_verdicts,
+    summarize_windowed_drift,
+    windowed_drift_statistics,
+    windowed_drift_verdicts,
+)
 from src.quality.anomaly_detector import detect_anomalies
-from src.agent.reasoning_agent import llm_reasoning
-from src.agent.notifier import send_alert
+from src.agent.auto_corrector import auto_correct
+from src.agent.reasoning_agent import llm_reasoning_batch
+from src.agent.notifier import AlertDispatcher, send_alert
 
 # Great Expectations validation integration
 from great_expectations_validation import (
@@ -31,6 +41,8 @@ from great_expectations_validation import (
 import json
 import os
 
+import pandas as pd
+
 
 def run_great_expectations_validation():
     """Runs Great Expectations data validation on PostgreSQL source."""
@@ -68,38 +80,151 @@ def main():
 
     csv_df = sources.get("CSV_SOURCE")
     api_df = sources.get("API_SOURCE")
+    numerical_cols = ["Open", "Close", "Volume"]
+
+    # Alerts are delivered in the background so the pipeline never waits on the network
+    dispatcher = AlertDispatcher(thresholds.get("alerting"))
+
+    # Stage results are memoized on input fingerprint + config section + code version
+    cache = ResultCache()
+    csv_fp = fingerprint_frame(csv_df)
+    api_fp = fingerprint_frame(api_df)
+    correction_cfg = thresholds.get("auto_correction")
+    drift_cfg = thresholds.get("drift_detection", {})
+    anomaly_cfg = thresholds.get("anomaly_detection", {})
 
     # Step 2: Data Quality Check
-    quality_report = calculate_quality_metrics(csv_df)
+    quality_report, _ = cache.run("quality", [csv_fp], None, calculate_quality_metrics, csv_df)
     logger.info(f"Data Quality Report: {quality_report}")
+    null_rates, _ = cache.run(
+        "null_rates", [csv_fp, numerical_cols], None, column_null_rates, csv_df, numerical_cols
+    )
+
+    # Step 2b: Auto-Correction & Revalidation of Changed Rows
+    # The corrected frame is not cached, so it is rebuilt only when a downstream stage misses.
+    correction_key = cache.key("auto_correction", [csv_fp], correction_cfg, auto_correct)
+    # Raw drift statistics do not depend on the p-value threshold, so they key on data only
+    drift_key = cache.key("drift", [correction_key, api_fp, numerical_cols], None, drift_statistics)
+    anomaly_key = cache.key("anomaly", [correction_key, numerical_cols], anomaly_cfg, detect_anomalies)
+    # Like drift, the windowed series is cached without verdicts; the threshold is applied on read
+    window_cfg = drift_cfg.get("windowed", {})
+    window_key = cache.key("windowed_drift", [correction_key, numerical_cols], window_cfg, windowed_drift_statistics)
+    window_enabled = bool(window_cfg.get("enabled")) and csv_df is not None \
+        and window_cfg.get("date_column", "Date") in csv_df.columns
+    downstream_keys = [drift_key, anomaly_key] + ([window_key] if window_enabled else [])
+
+    # Downstream stages share one read-only StageInput instead of copying the frame
+    hit, correction_report = cache.get(correction_key)
+    csv_input = StageInput(csv_df)
+    if hit and correction_report and all(cache.contains(key) for key in downstream_keys):
+        logger.info("Cache hit for auto-correction and all downstream stages.")
+    else:
+        correction_report, csv_input, _ = auto_correct(
+            csv_df, quality_report, numerical_cols, correction_cfg
+        )
+        if correction_report:
+            cache.put(correction_key, correction_report)
+    # A failed correction returns an empty report and the uncorrected frame; neither it nor
+    # the stages computed from that frame are cached, so the next run retries
+    cache_downstream = bool(correction_report)
+    logger.info(f"Auto-Correction Report: {correction_report}")
 
     # Step 3: Drift Detection
-    drift_report = detect_drift(csv_df, api_df, ["Open", "Close", "Volume"])
+    hit, drift_stats = cache.get(drift_key)
+    if not hit:
+        print("Running Drift Detection...")
+        drift_stats = drift_statistics(csv_input, api_df, numerical_cols)
+        if cache_downstream:
+            cache.put(drift_key, drift_stats)
+    drift_report = drift_verdicts(drift_stats, drift_cfg.get("p_value_threshold", 0.05))
     logger.info(f"Drift Report: {drift_report}")
 
+    # Step 3b: Rolling Windowed Drift (drift time series over the Date column)
+    window_summary = {}
+    if window_enabled:
+        hit, window_records = cache.get(window_key)
+        if not hit:
+            window_series = windowed_drift_statistics(
+                csv_input,
+                numerical_cols,
+                date_col=window_cfg.get("date_column", "Date"),
+                window_days=window_cfg.get("window_days", 7),
+                reference_days=window_cfg.get("reference_days", 90),
+                step_days=window_cfg.get("step_days", 1),
+                group_col=window_cfg.get("group_by"),
+                bins=window_cfg.get("bins", 20),
+            )
+            window_records = window_series.astype({"window_end": str}).to_dict("records") if not window_series.empty else []
+            if cache_downstream:
+                cache.put(window_key, window_records)
+        window_series = windowed_drift_verdicts(
+            pd.DataFrame(window_records), drift_cfg.get("p_value_threshold", 0.05)
+        )
+        if not window_series.empty:
+            window_series["window_end"] = pd.to_datetime(window_series["window_end"])
+            save_dataframe(window_series, os.path.join("data/reports", timestamped_filename("drift_timeseries", ".csv")))
+        window_summary = summarize_windowed_drift(window_series)
+        logger.info(f"Windowed Drift Summary: {window_summary}")
+
     # Step 4: Anomaly Detection
-    anomaly_report, _ = detect_anomalies(csv_df, ["Open", "Close", "Volume"])
+    hit, anomaly_report = cache.get(anomaly_key)
+    if not hit:
+        anomaly_report, _ = detect_anomalies(
+            csv_input, numerical_cols, anomaly_cfg.get("contamination_rate", 0.05)
+        )
+        if cache_downstream:
+            cache.put(anomaly_key, anomaly_report)
     logger.info(f"Anomaly Report: {anomaly_report}")
 
     # Step 5: Agent Reasoning (LLM Summary)
-    reasoning = llm_reasoning(quality_report, drift_report)
+    # Model responses are memoized inside the agent; timeouts fall back to the rule-based summary.
+    # Every source (and every ticker of a per-ticker drift series) goes into one prompt.
+    reasoning_inputs = {"CSV_SOURCE": (quality_report, drift_report)}
+    if api_df is not None:
+        api_quality, _ = cache.run("quality", [api_fp], None, calculate_quality_metrics, api_df)
+        reasoning_inputs["API_SOURCE"] = (api_quality, drift_report)
+    ticker_drift = {}
+    for key, summary in window_summary.items():
+        if ":" in key:
+            ticker, col = key.split(":", 1)
+            ticker_drift.setdefault(ticker, {})[col] = " Drift Detected" if summary["latest_drift"] else "✅ Stable"
+    for ticker, verdicts in ticker_drift.items():
+        reasoning_inputs[ticker] = ({}, verdicts)
+    reasoning, reasoning_usage = llm_reasoning_batch(reasoning_inputs, thresholds.get("reasoning"), cache)
     logger.info(f"Agent Reasoning: {reasoning}")
+    logger.info(f"Reasoning Usage: {reasoning_usage}")
 
     # Step 6: Conditional Alerting
     if quality_report["completeness"] < thresholds["data_quality"]["completeness"]:
-        send_alert("Completeness below threshold!", "High")
+        send_alert("Completeness below threshold!", "High", dispatcher)
         logger.warning("Completeness below acceptable threshold!")
+    for col, verdict in drift_report.items():
+        if "Drift" in verdict:
+            send_alert(f"Drift detected in {col}.", "Medium", dispatcher)
+    for key, summary in window_summary.items():
+        if summary["latest_drift"]:
+            send_alert(f"Windowed drift in {key} (window ending {summary['latest_window_end']}).", "Medium", dispatcher)
+    alert_delivery = dispatcher.close()
+    logger.info(f"Alert Delivery: {alert_delivery}")
 
     # Step 7: Archive Quality Reports
     combined_report = {
         "data_quality": quality_report,
+        "auto_correction": correction_report,
         "drift": drift_report,
+        "windowed_drift": window_summary,
         "anomalies": anomaly_report,
         "agent_reasoning": reasoning,
+        "reasoning_usage": reasoning_usage,
+        "alert_delivery": alert_delivery,
     }
     report_path = archive_report(combined_report)
     logger.info(f"Reports archived at: {report_path}")
 
+    # Step 7b: Keep raw per-column statistics for threshold replay
+    run_id = os.path.splitext(os.path.basename(report_path))[0]
+    record_run_statistics(run_id, drift_stats, anomaly_report, null_rates, quality_report["completeness"])
+
     # Step 8: Run Great Expectations Validation
     # ge_results = run_great_expectations_validation()
     # logger.info(f"Great Expectations Validation Summary: {ge_results}")
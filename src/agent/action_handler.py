@@ -1,4 +1,25 @@
 # This script will contain the logic for handling actions.
+# ------------------------------------------------------------
+# Human feedback and threshold tuning entry point:
+#
+#   python -m src.agent.action_handler feedback <run_id> false_alarm --column Open
+#   python -m src.agent.action_handler feedback <run_id> missed_drift --check completeness
+#   python -m src.agent.action_handler tune [--write]
+#
+# `feedback` records a label on a past run's verdict, `tune`
+# replays the run history under candidate thresholds and,
+# with --write, stores the best ones in thresholds.yaml.
+# ------------------------------------------------------------
+import argparse
+import re
+
+import yaml
+
+from src.agent.threshold_replay import CHECKS, search_thresholds
+from src.utils.run_history import FEEDBACK_LABELS, FRAME_COLUMN, record_feedback
+
+THRESHOLDS_PATH = "config/thresholds.yaml"
+
 
 def adaptive_update(feedback, drift_thresholds):
     if feedback == "false_alarm":
@@ -6,3 +27,86 @@ def adaptive_update(feedback, drift_thresholds):
     elif feedback == "missed_drift":
         drift_thresholds["p_value"] -= 0.01
     return drift_thresholds
+
+
+def tune_thresholds(thresholds, stats=None, feedback=None):
+    """Replace thresholds with the best candidates found by replaying run history."""
+    results = search_thresholds(thresholds, stats, feedback)
+    for check, result in results.items():
+        section, key = CHECKS[check][2]
+        if result["best"] is not None:
+            thresholds.setdefault(section, {})[key] = result["best"]
+    return thresholds, results
+
+
+def write_thresholds(updates, path=THRESHOLDS_PATH):
+    """
+    Update `section: key: value` entries of thresholds.yaml in place, keeping its
+    comments and layout. updates maps (section, key) -> value.
+    """
+    with open(path, "r") as f:
+        lines = f.read().splitlines(keepends=True)
+    remaining = dict(updates)
+    section = None
+    for i, line in enumerate(lines):
+        top = re.match(r"^(\w+):", line)
+        if top:
+            section = top.group(1)
+            continue
+        entry = re.match(r"^(\s+)(\w+):(\s*)([^#\n]*?)(\s*#.*)?(\n?)$", line)
+        if entry and (section, entry.group(2)) in remaining:
+            value = remaining.pop((section, entry.group(2)))
+            indent, key, space, _, comment, newline = entry.groups()
+            lines[i] = f"{indent}{key}:{space or ' '}{value}{comment or ''}{newline}"
+    if remaining:
+        raise KeyError(f"Thresholds not found in {path}: {sorted(remaining)}")
+    text = "".join(lines)
+    yaml.safe_load(text)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record verdict feedback and tune thresholds from run history.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    feedback = commands.add_parser("feedback", help="Label a verdict of a past run.")
+    feedback.add_argument("run_id", help="Report file stem of the run, e.g. data_quality_report_20250101_120000")
+    feedback.add_argument("label", choices=FEEDBACK_LABELS)
+    feedback.add_argument("--check", choices=sorted(CHECKS), default="drift")
+    feedback.add_argument("--column", help="Column the verdict was about (drift checks)")
+
+    tune = commands.add_parser("tune", help="Replay history and suggest thresholds.")
+    tune.add_argument("--config", default=THRESHOLDS_PATH)
+    tune.add_argument("--write", action="store_true", help="Store the suggested thresholds in the config file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "feedback":
+        column = FRAME_COLUMN if args.check == "completeness" else args.column
+        if column is None:
+            parser.error("--column is required for drift feedback")
+        record_feedback(args.run_id, column, args.label, args.check)
+        print(f"Recorded {args.label} for {args.check} on {column} in run {args.run_id}.")
+        return
+
+    with open(args.config, "r") as f:
+        thresholds = yaml.safe_load(f)
+    current = {check: thresholds.get(CHECKS[check][2][0], {}).get(CHECKS[check][2][1]) for check in CHECKS}
+    _, results = tune_thresholds(thresholds)
+    updates = {}
+    for check, result in results.items():
+        print(f"{check}: {result}")
+        if result["best"] is not None and result["best"] != current[check]:
+            updates[CHECKS[check][2]] = result["best"]
+    if args.write and updates:
+        write_thresholds(updates, args.config)
+        print(f"Updated {len(updates)} threshold(s) in {args.config}.")
+    elif updates:
+        print("Run with --write to store these thresholds.")
+    else:
+        print("Current thresholds are already the best candidates.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# ------------------------------------------------------------
+# Auto-Correction Module
+# ------------------------------------------------------------
+# Rule-based correction stage for data that fails the quality
+# checks. Every fix is vectorized over whole columns and is
+# driven by the quality report:
+#   - type coercion of numeric columns stored as text
+#   - clipping of negative prices / volumes  (numeric_validity)
+#   - dropping or merging duplicate records  (uniqueness)
+#   - imputation of null values              (completeness)
+#     in the numerical columns only, unless configured; dates
+#     and identifiers are never invented, their nulls are kept
+#     and reported. With impute_group (e.g. Symbol) each row is
+#     filled from its own group, never from a pooled median
+# Cells touched by a fix are tracked, and only the rows that
+# changed are revalidated. Issue positions for untouched rows
+# are recorded once up front (sparsely) and reused for the
+# post-fix metrics.
+# The input frame is never copied: corrected cells are kept as
+# sparse patches (positions + values) on the returned
+# StageInput, dropped duplicates become its row mask, and only
+# columns whose dtype changes (coercion) are rebuilt.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from src.utils.stage_input import (
+    StageInput,
+    chunked_mean,
+    chunked_quantile,
+    duplicated_rows,
+    row_hashes,
+)
+
+DEFAULT_CORRECTION_CFG = {
+    "impute_strategy": "median",   # median | mean (numeric); non-numeric use the mode
+    "duplicate_strategy": "drop",  # drop | merge
+    "duplicate_keys": None,        # e.g. ["Date", "Symbol"]; None -> exact row duplicates
+    "clip_negative": True,
+    "impute_columns": None,        # None -> numerical_cols; nulls elsewhere are left and reported
+    "impute_group": None,          # e.g. "Symbol": numeric fills from the row's own group only
+}
+
+
+def _mark(changed_cells, col, positions):
+    """Record changed row positions for a column."""
+    if len(positions) == 0:
+        return
+    if col in changed_cells:
+        positions = np.union1d(changed_cells[col], positions)
+    changed_cells[col] = positions
+
+
+def _changed_positions(changed_cells, n_rows):
+    """Collapse per-column changed positions into sorted unique row positions."""
+    changed = np.zeros(n_rows, dtype=bool)
+    for positions in changed_cells.values():
+        changed[positions] = True
+    return np.flatnonzero(changed)
+
+
+def _patch(patches, changed_cells, col, positions, values):
+    """Record corrected values for a column at the given row positions."""
+    if len(positions) == 0:
+        return
+    values = np.asarray(values)
+    if col in patches:
+        positions = np.concatenate([patches[col][0], positions])
+        values = np.concatenate([patches[col][1], values])
+        order = np.argsort(positions, kind="stable")
+        positions, values = positions[order], values[order]
+    patches[col] = (positions, values)
+    _mark(changed_cells, col, positions)
+
+
+def _coerce_types(fixed, numerical_cols, changed_cells, log):
+    """Convert text-typed numeric columns; unparseable entries become nulls."""
+    for col in numerical_cols:
+        if col not in fixed.columns or pd.api.types.is_numeric_dtype(fixed[col]):
+            continue
+        original = fixed[col]
+        coerced = pd.to_numeric(original, errors="coerce")
+        invalid = np.flatnonzero(coerced.isna().to_numpy() & original.notna().to_numpy())
+        fixed[col] = coerced
+        _mark(changed_cells, col, invalid)
+        log["coerced"][col] = int(len(invalid))
+
+
+def _clip_negative(fixed, numerical_cols, patches, changed_cells, log):
+    """Clip negative prices / volumes to zero."""
+    for col in numerical_cols:
+        if col not in fixed.columns or not pd.api.types.is_numeric_dtype(fixed[col]):
+            continue
+        # Nullable columns (Int64, Float64) compare to pd.NA on nulls, which is not negative
+        negative = np.flatnonzero(fixed[col].lt(0).to_numpy(dtype=bool, na_value=False))
+        if len(negative) == 0:
+            continue
+        zeros = np.zeros(len(negative), dtype=fixed[col].iloc[:0].to_numpy().dtype)
+        _patch(patches, changed_cells, col, negative, zeros)
+        log["clipped"][col] = int(len(negative))
+
+
+def _merge_duplicates(overlay, key_frame, keys, patches, changed_cells, log):
+    """Fill nulls in the first record of each duplicate key group from the later ones."""
+    in_group = key_frame.duplicated(subset=keys, keep=False).to_numpy()
+    if not in_group.any():
+        return
+    positions = np.flatnonzero(in_group)
+    group = overlay.take(positions)
+    is_first = ~group.duplicated(subset=keys, keep="first").to_numpy()
+    value_cols = [col for col in group.columns if col not in keys]
+    merged = group.groupby(keys, sort=False, dropna=False)[value_cols].transform("first")
+    for col in value_cols:
+        fill = is_first & group[col].isna().to_numpy() & merged[col].notna().to_numpy()
+        if not fill.any():
+            continue
+        _patch(patches, changed_cells, col, positions[fill], merged[col].to_numpy()[fill])
+        log["merged"][col] = int(fill.sum())
+
+
+def _group_fills(fixed, keep, patches, col, group_codes, positions, strategy):
+    """
+    Median / mean of the kept values in the group of each null position (NaN when the
+    group has no value, or the row has no group). Only rows of groups that need a fill
+    are gathered, and they are grouped with one argsort of their codes.
+    """
+    codes = group_codes[positions]
+    needed = np.unique(codes[codes >= 0])
+    rows = keep & np.isin(group_codes, needed)
+    values = StageInput(fixed, rows=rows, patches=patches).values(col)
+    row_codes = group_codes[rows]
+    del rows
+    order = np.argsort(row_codes, kind="stable")
+    bounds = np.searchsorted(row_codes[order], np.r_[needed, needed[-1] + 1] if len(needed) else needed)
+    stats = np.full(int(group_codes.max()) + 1, np.nan)
+    for group, lo, hi in zip(needed, bounds[:-1], bounds[1:]):
+        group_values = values[order[lo:hi]]
+        group_values = group_values[~np.isnan(group_values)]
+        if len(group_values):
+            stats[group] = group_values.mean() if strategy == "mean" else np.median(group_values)
+    return np.where(codes >= 0, stats[codes], np.nan)
+
+
+def _impute_nulls(fixed, keep, columns, strategy, group_col, patches, changed_cells, log):
+    """
+    Fill nulls in the given columns with the column median / mean (numeric) or mode
+    (other types). Nulls in every other column are counted, not filled.
+    Numeric fills are computed chunk by chunk over the kept, already corrected values,
+    or per group_col value when set (and present), so a ticker is never filled from other
+    tickers' price levels. Nulls whose group has no value to fill from are left and counted.
+    """
+    kept = StageInput(fixed, rows=keep, patches=patches)
+    group_codes = None
+    if group_col and group_col in fixed.columns:
+        group_codes = StageInput(fixed, patches=patches).codes(group_col)[0]
+    for col in fixed.columns:
+        nulls = fixed[col].isna().to_numpy() & keep
+        if col in patches:
+            nulls[patches[col][0]] = False  # already filled by a merge
+        if not nulls.any():
+            continue
+        if col not in columns:
+            log["left_null"][col] = int(nulls.sum())
+            continue
+        positions = np.flatnonzero(nulls)
+        if pd.api.types.is_numeric_dtype(fixed[col]) and group_codes is not None:
+            fills = _group_fills(fixed, keep, patches, col, group_codes, positions, strategy)
+            found = ~np.isnan(fills)
+            if not found.all():
+                log["left_null"][col] = int((~found).sum())
+            positions, fills = positions[found], fills[found]
+            if pd.api.types.is_integer_dtype(fixed[col]):
+                fills = fills.round()
+        else:
+            if pd.api.types.is_numeric_dtype(fixed[col]):
+                chunks = kept.chunks(col)
+                fill = chunked_mean(chunks) if strategy == "mean" else chunked_quantile(chunks, 0.5)
+                if np.isnan(fill):
+                    continue
+                if pd.api.types.is_integer_dtype(fixed[col]):
+                    fill = round(fill)  # nullable integer columns (Int64) cannot hold a fractional fill
+            else:
+                kept_values = pd.Series(kept.column(col)).dropna()
+                if kept_values.empty:
+                    continue
+                fill = kept_values.mode().iloc[0]
+            fills = np.repeat(pd.Series([fill]).to_numpy(), len(positions))
+        if len(positions) == 0:
+            continue
+        _patch(patches, changed_cells, col, positions, fills)
+        log["imputed"][col] = int(len(positions))
+
+
+def auto_correct(df, quality_report, numerical_cols, correction_cfg=None):
+    """
+    Apply rule-based corrections to a dataframe and revalidate the changed rows.
+    Args:
+        df (pd.DataFrame): Input dataframe (left untouched)
+        quality_report (dict): Output of calculate_quality_metrics for df
+        numerical_cols (list): Columns expected to hold non-negative numbers
+        correction_cfg (dict): Overrides for DEFAULT_CORRECTION_CFG
+    Returns:
+        dict: Correction summary with post-fix quality metrics,
+        StageInput: Input frame with the corrected cells as patches, masked to the rows
+                    kept after deduplication,
+        dict: Column -> index labels of the corrected cells
+    """
+    print("Running Auto-Correction...")
+    cfg = {**DEFAULT_CORRECTION_CFG, **(correction_cfg or {})}
+    log = {"coerced": {}, "clipped": {}, "merged": {}, "imputed": {}, "left_null": {}}
+    changed_cells = {}
+
+    try:
+        fixed = df.copy(deep=False)
+        n_rows, n_cols = fixed.shape
+        if n_rows == 0:
+            return {"rows_changed": 0, "rows_dropped": 0, "fixes": log}, StageInput(fixed), {}
+
+        _coerce_types(fixed, numerical_cols, changed_cells, log)
+        patches = {}
+        overlay = StageInput(fixed, patches=patches)
+
+        # Baseline issue positions, found once over the full frame
+        numeric_cols = list(fixed.select_dtypes("number").columns)
+        null_pos = {col: np.flatnonzero(fixed[col].isna().to_numpy()) for col in fixed.columns}
+        invalid_pos = {col: np.flatnonzero(~fixed[col].ge(0).to_numpy(dtype=bool, na_value=False)) for col in numeric_cols}
+        hashes = row_hashes(fixed)
+
+        # The report is rounded to 3 decimals, so exact counts also trigger a fix
+        has_invalid = any(len(pos) for pos in invalid_pos.values())
+        if cfg["clip_negative"] and (quality_report.get("numeric_validity", 1) < 1 or has_invalid):
+            _clip_negative(fixed, numerical_cols, patches, changed_cells, log)
+
+        keep = np.ones(n_rows, dtype=bool)
+        keys = cfg["duplicate_keys"]
+        if keys:
+            key_frame = overlay.frame() if set(keys) & set(patches) else fixed
+            if cfg["duplicate_strategy"] == "merge":
+                _merge_duplicates(overlay, key_frame, keys, patches, changed_cells, log)
+            keep = ~key_frame.duplicated(subset=keys, keep="first").to_numpy()
+            del key_frame
+        else:
+            touched = _changed_positions(changed_cells, n_rows)
+            hashes[touched] = row_hashes(overlay.take(touched))
+            duplicated = duplicated_rows(hashes, overlay.take)
+            if quality_report.get("uniqueness", 1) < 1 or duplicated.any():
+                keep = ~duplicated
+            del duplicated
+
+        has_nulls = any(len(pos) for pos in null_pos.values())
+        if quality_report.get("completeness", 1) < 1 or has_nulls or any(log["coerced"].values()):
+            impute_cols = cfg["impute_columns"] or numerical_cols
+            _impute_nulls(fixed, keep, impute_cols, cfg["impute_strategy"], cfg["impute_group"],
+                          patches, changed_cells, log)
+
+        # Revalidate only the rows touched by a fix
+        changed_pos = _changed_positions(changed_cells, n_rows)
+        changed_pos = changed_pos[keep[changed_pos]]
+        untouched = keep.copy()
+        untouched[changed_pos] = False
+        rows = overlay.take(changed_pos)
+
+        new_nulls = rows.isna().to_numpy().sum(axis=1)
+        new_valid = rows[numeric_cols].ge(0).to_numpy(dtype=bool, na_value=False)
+        hashes[changed_pos] = row_hashes(rows)
+
+        # Untouched kept rows are already unique, so duplicates can only involve changed rows;
+        # hashes narrow the candidates down and the values decide
+        collide = pd.Series(hashes, copy=False).isin(hashes[changed_pos]).to_numpy() & untouched
+        candidates = np.union1d(changed_pos, np.flatnonzero(collide))
+        del collide, hashes
+        candidate_rows = overlay.take(candidates)
+        n_duplicates = int(candidate_rows.duplicated(keep="first").sum())
+        changed_dup = candidate_rows.duplicated(keep=False).to_numpy()[np.isin(candidates, changed_pos)]
+        del candidate_rows
+
+        n_kept = int(keep.sum())
+        n_untouched = int(untouched.sum())
+        total_nulls = sum(int(untouched[pos].sum()) for pos in null_pos.values()) + int(new_nulls.sum())
+        valid_counts = np.array([n_untouched - int(untouched[invalid_pos[col]].sum()) for col in numeric_cols],
+                                dtype=np.int64) + new_valid.sum(axis=0)
+        still_failing = (new_nulls > 0) | ~new_valid.all(axis=1) | changed_dup
+
+        metrics_after = {
+            "completeness": round(1 - total_nulls / (n_kept * n_cols), 3),
+            "uniqueness": round(1 - n_duplicates / n_kept, 3),
+            "numeric_validity": round(float((valid_counts / n_kept).mean()), 3) if numeric_cols else 1.0,
+        }
+
+        index_changes = {col: fixed.index[pos[keep[pos]]] for col, pos in changed_cells.items()}
+
+        correction_report = {
+            "rows_changed": int(len(changed_pos)),
+            "cells_changed": int(sum(len(idx) for idx in index_changes.values())),
+            "rows_dropped": int(n_rows - n_kept),
+            "fixes": log,
+            "revalidation": {
+                "rows_revalidated": int(len(changed_pos)),
+                "rows_still_failing": int(still_failing.sum()),
+                "metrics_after": metrics_after,
+            },
+        }
+        print("Auto-Correction Complete.")
+        return correction_report, StageInput(fixed, rows=keep, patches=patches), index_changes
+
+    except Exception as e:
+        print(f"Error in auto-correction: {e}")
+        return {}, StageInput(df), {}
@@ -1,7 +1,287 @@
 # This script will contain the logic for sending notifications.
+# ------------------------------------------------------------
+# Alerts are queued and delivered by a background worker so
+# the pipeline never waits on the network. The worker:
+#   - coalesces identical alerts inside a dedup window
+#   - batches pending alerts into digests of max_batch_size
+#   - applies a per-channel rate limit (messages / minute)
+#   - retries failed deliveries with exponential backoff
+# The queue is bounded; when it is full new alerts are dropped
+# and counted instead of blocking the caller. On close the
+# final flush still sends digests of at most max_batch_size
+# alerts, waits for the channel's rate limit instead of skipping
+# it, and retries at most final_max_retries times; alerts
+# still undelivered when close() gives up are reported as
+# abandoned rather than silently lost with the daemon worker.
+# src/agent/stub_alert_server.py is a local webhook / SMTP
+# stand-in for exercising the channels.
+# ------------------------------------------------------------
+import math
+import queue
 import smtplib
+import threading
+import time
+from collections import deque
+from email.message import EmailMessage
 
-def send_alert(summary, impact):
+import requests
+
+DEFAULT_ALERTING_CFG = {
+    "channels": ["console"],           # console | webhook | email
+    "email": None,
+    "email_sender": "guardian@localhost",
+    "smtp_host": "localhost",
+    "smtp_port": 25,
+    "slack_webhook": None,
+    "queue_size": 1000,
+    "dedup_window_seconds": 300,
+    "batch_interval_seconds": 2.0,
+    "max_batch_size": 50,
+    "rate_limit_per_minute": {"console": 600, "webhook": 20, "email": 5},
+    "max_retries": 3,
+    "final_max_retries": 1,
+    "retry_backoff_seconds": 0.5,
+    "delivery_timeout_seconds": 5,
+}
+
+
+def send_alert(summary, impact, dispatcher=None):
+    """Queue an alert on the dispatcher, or print it inline when none is running."""
+    if dispatcher is not None:
+        return dispatcher.submit(summary, impact)
     print(" Sending Notification...")
     print(f"ALERT: {summary} | Impact: {impact}")
-    # Mock alert system (future: integrate Slack or email)
+    return True
+
+
+class _RateLimiter:
+    """Token bucket allowing `per_minute` messages with bursts up to the same amount."""
+
+    def __init__(self, per_minute):
+        self.capacity = max(float(per_minute), 1.0)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def try_acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def acquire(self, cancel):
+        """Wait for a token; False if the `cancel` event is set first."""
+        while not self.try_acquire():
+            if cancel.wait((1 - self.tokens) / self.rate):
+                return False
+        return True
+
+
+def format_digest(alerts):
+    """Render a list of pending alerts as one digest message."""
+    lines = [f"[Data Quality Guardian] {len(alerts)} alert(s)"]
+    for alert in alerts:
+        count = f" (x{alert['count']})" if alert["count"] > 1 else ""
+        lines.append(f"- [{alert['impact']}] {alert['summary']}{count}")
+    return "\n".join(lines)
+
+
+class AlertDispatcher:
+    """Non-blocking, batched alert delivery with dedup, rate limits and retries."""
+
+    def __init__(self, alerting_cfg=None, senders=None):
+        self.cfg = {**DEFAULT_ALERTING_CFG, **(alerting_cfg or {})}
+        self.cfg["rate_limit_per_minute"] = {
+            **DEFAULT_ALERTING_CFG["rate_limit_per_minute"],
+            **(self.cfg.get("rate_limit_per_minute") or {}),
+        }
+        default_senders = {
+            "console": self._send_console,
+            "webhook": self._send_webhook,
+            "email": self._send_email,
+        }
+        self.senders = {**default_senders, **(senders or {})}
+        self.channels = [ch for ch in self.cfg["channels"] if ch in self.senders]
+        self.limiters = {ch: _RateLimiter(self.cfg["rate_limit_per_minute"].get(ch, 60)) for ch in self.channels}
+
+        self._queue = queue.Queue(maxsize=self.cfg["queue_size"])
+        self._pending = {ch: [] for ch in self.channels}
+        self._last_seen = {}
+        self._latencies = deque(maxlen=10_000)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._abandon = threading.Event()
+        self.stats = {"submitted": 0, "dropped": 0, "deduplicated": 0,
+                      "messages_sent": 0, "alerts_delivered": 0, "failed": 0, "abandoned": 0}
+
+        self._worker = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._worker.start()
+
+    # ---- caller side -------------------------------------------------
+    def submit(self, summary, impact="Medium"):
+        """Queue an alert without blocking. Returns False if the queue was full."""
+        try:
+            self._queue.put_nowait({"summary": summary, "impact": impact, "submitted": time.monotonic()})
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            return False
+        with self._lock:
+            self.stats["submitted"] += 1
+        return True
+
+    def close(self, timeout=None):
+        """
+        Stop the worker after delivering everything still pending. By default waits
+        long enough for the final digests of every channel (capped retries and rate
+        limit waits included); alerts left when the wait runs out are given up and
+        counted as abandoned.
+        """
+        if timeout is None:
+            timeout = self._final_flush_budget()
+        self._stop.set()
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            self._abandon.set()
+            pending = {id(alert) for ch in self.channels for alert in list(self._pending[ch])}
+            abandoned = len(pending) + self._queue.qsize()
+            with self._lock:
+                self.stats["abandoned"] += abandoned
+            print(f"Alert delivery did not finish within {timeout:.1f}s; {abandoned} alert(s) abandoned.")
+        return self.report()
+
+    def _final_flush_budget(self):
+        """Worst-case seconds for the final flush of everything queued or pending."""
+        attempts = self.cfg["final_max_retries"] + 1
+        per_message = attempts * (self.cfg["delivery_timeout_seconds"]
+                                  + self.cfg["retry_backoff_seconds"] * 2 ** attempts)
+        alerts = self._queue.qsize() + max((len(p) for p in self._pending.values()), default=0)
+        messages = max(1, math.ceil(alerts / self.cfg["max_batch_size"]))
+        budget = 1.0
+        for ch in self.channels:
+            limiter = self.limiters[ch]
+            budget += messages * per_message + max(0.0, messages - limiter.tokens) / limiter.rate
+        return budget
+
+    def report(self):
+        """Delivery counters and latency (submit -> delivered) percentiles in ms."""
+        with self._lock:
+            stats = dict(self.stats)
+            latencies = sorted(self._latencies)
+        if latencies:
+            pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+            stats["latency_ms"] = {"p50": pick(0.5), "p95": pick(0.95), "max": round(latencies[-1] * 1000, 2)}
+        else:
+            stats["latency_ms"] = {}
+        return stats
+
+    # ---- worker side -------------------------------------------------
+    def _ingest(self, alert):
+        """Coalesce duplicates within the dedup window, otherwise add to every channel."""
+        key = (alert["summary"], alert["impact"])
+        now = alert["submitted"]
+        last = self._last_seen.get(key)
+        if last is not None and now - last["seen"] < self.cfg["dedup_window_seconds"]:
+            last["seen"] = now
+            if last["pending"] is not None:
+                last["pending"]["count"] += 1
+            with self._lock:
+                self.stats["deduplicated"] += 1
+            return
+        pending = {**alert, "count": 1}
+        self._last_seen[key] = {"seen": now, "pending": pending}
+        for ch in self.channels:
+            self._pending[ch].append(pending)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        interval = self.cfg["batch_interval_seconds"]
+        while not self._abandon.is_set():
+            timeout = max(0.0, interval - (time.monotonic() - last_flush))
+            try:
+                self._ingest(self._queue.get(timeout=min(timeout, 0.1) if timeout else 0))
+                continue
+            except queue.Empty:
+                pass
+            stopping = self._stop.is_set()
+            if stopping or time.monotonic() - last_flush >= interval:
+                self._flush(final=stopping)
+                last_flush = time.monotonic()
+            if stopping and self._queue.empty():
+                return
+
+    def _flush(self, final=False):
+        """Deliver pending alerts as digests, within each channel's rate limit."""
+        size = self.cfg["max_batch_size"]
+        for ch in self.channels:
+            pending = self._pending[ch]
+            while pending:
+                batch = pending[:size]
+                # On shutdown the worker waits for the rate limit instead of deferring
+                if final:
+                    if not self.limiters[ch].acquire(self._abandon):
+                        return
+                elif not self.limiters[ch].try_acquire():
+                    break
+                self._deliver(ch, batch, final)
+                del pending[:len(batch)]
+        # Later duplicates can no longer be coalesced into alerts that have gone out
+        still_pending = {id(alert) for ch in self.channels for alert in self._pending[ch]}
+        horizon = time.monotonic() - self.cfg["dedup_window_seconds"]
+        for key, entry in list(self._last_seen.items()):
+            if entry["pending"] is not None and id(entry["pending"]) not in still_pending:
+                entry["pending"] = None
+            if entry["pending"] is None and entry["seen"] < horizon:
+                del self._last_seen[key]
+
+    def _deliver(self, channel, batch, final=False):
+        message = format_digest(batch)
+        backoff = self.cfg["retry_backoff_seconds"]
+        retries = min(self.cfg["max_retries"], self.cfg["final_max_retries"]) if final else self.cfg["max_retries"]
+        for attempt in range(retries + 1):
+            if self._abandon.is_set():
+                return
+            try:
+                self.senders[channel](message)
+                break
+            except Exception as e:
+                if attempt == retries:
+                    print(f"Alert delivery via {channel} failed: {e}")
+                    with self._lock:
+                        self.stats["failed"] += len(batch)
+                    return
+                # Backoff is cut short when close() gives up on the worker
+                if self._abandon.wait(backoff * (2 ** attempt)):
+                    return
+        if self._abandon.is_set():
+            return  # close() has already reported this batch as abandoned
+        delivered = time.monotonic()
+        with self._lock:
+            self.stats["messages_sent"] += 1
+            self.stats["alerts_delivered"] += len(batch)
+            self._latencies.extend(delivered - alert["submitted"] for alert in batch)
+
+    # ---- channels ----------------------------------------------------
+    def _send_console(self, message):
+        print(" Sending Notification...")
+        print(message)
+
+    def _send_webhook(self, message):
+        response = requests.post(
+            self.cfg["slack_webhook"], json={"text": message},
+            timeout=self.cfg["delivery_timeout_seconds"],
+        )
+        response.raise_for_status()
+
+    def _send_email(self, message):
+        msg = EmailMessage()
+        msg["Subject"] = message.splitlines()[0]
+        msg["From"] = self.cfg["email_sender"]
+        msg["To"] = self.cfg["email"]
+        msg.set_content(message)
+        with smtplib.SMTP(self.cfg["smtp_host"], self.cfg["smtp_port"],
+                          timeout=self.cfg["delivery_timeout_seconds"]) as smtp:
+            smtp.send_message(msg)
@@ -1,8 +1,41 @@
 # This script will contain the logic for the reasoning agent.
+# ------------------------------------------------------------
+# Reasoning is produced by a local LLM (Ollama /api/generate)
+# when one is configured, with the rule-based summary below
+# as the fallback:
+#   - the model call is async and bounded by a hard latency
+#     budget; on timeout or error the rule-based output is used
+#   - responses are memoized on a canonical hash of the report
+#     input, keyed with the code version of this module (prompt
+#     and parsing), so unchanged reports never reach the model
+#   - several sources / tickers are batched into one prompt
+# Token and latency counts are returned for the run report.
+# ------------------------------------------------------------
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def llm_reasoning(data_quality_report, drift_report):
-    print("Agent Reasoning about Data Quality...")
-    # Mock reasoning output (you can later connect to GPT)
+import requests
+
+from src.utils.result_cache import fingerprint_config
+
+DEFAULT_REASONING_CFG = {
+    "enabled": False,
+    "base_url": "http://localhost:11434",
+    "model": "llama3",
+    "latency_budget_seconds": 3.0,
+}
+
+PROMPT_TEMPLATE = """You are a data quality analyst. For every dataset below, read its
+data quality metrics and per-column drift results and reply with ONLY a JSON object
+mapping each dataset name to {{"summary": str, "impact": "Low"|"Medium"|"High", "action": str}}.
+
+{datasets}
+"""
+
+
+def rule_based_reasoning(data_quality_report, drift_report):
     issues = [col for col, val in drift_report.items() if "Drift" in val]
     summary = f"Detected drifts in {issues}. Recommend checking API refresh timing."
     reasoning_output = {
@@ -11,3 +44,115 @@ def llm_reasoning(data_quality_report, drift_report):
         "action": "Trigger API update and notify data team." if issues else "All stable."
     }
     return reasoning_output
+
+
+def _input_key(data_quality_report, drift_report, cfg):
+    """Canonical hash of one reasoning input (report content + model)."""
+    return fingerprint_config({"model": cfg["model"], "data_quality": data_quality_report, "drift": drift_report})
+
+
+def _generate(cfg, prompt):
+    """Blocking call to the model server's /api/generate endpoint."""
+    response = requests.post(
+        f"{cfg['base_url'].rstrip('/')}/api/generate",
+        json={"model": cfg["model"], "prompt": prompt, "stream": False, "format": "json"},
+        timeout=cfg["latency_budget_seconds"],
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _generate_with_budget(cfg, prompt, executor):
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(executor, _generate, cfg, prompt),
+        timeout=cfg["latency_budget_seconds"],
+    )
+
+
+def _parse_response(text, names):
+    """Pick the per-dataset reasoning entries that have all expected fields."""
+    parsed = json.loads(text)
+    results = {}
+    for name in names:
+        entry = parsed.get(name) if isinstance(parsed, dict) else None
+        if isinstance(entry, dict) and all(k in entry for k in ("summary", "impact", "action")):
+            results[name] = {k: str(entry[k]) for k in ("summary", "impact", "action")}
+    return results
+
+
+def llm_reasoning_batch(reports, reasoning_cfg=None, cache=None):
+    """
+    Reason about several datasets with at most one model call.
+    Args:
+        reports (dict): name -> (data_quality_report, drift_report)
+        reasoning_cfg (dict): Overrides for DEFAULT_REASONING_CFG
+        cache (ResultCache): Optional store for memoized model responses
+    Returns:
+        dict: name -> reasoning output,
+        dict: usage (model calls, cache hits, fallbacks, tokens, latency)
+    """
+    print("Agent Reasoning about Data Quality...")
+    cfg = {**DEFAULT_REASONING_CFG, **(reasoning_cfg or {})}
+    usage = {"model_calls": 0, "cache_hits": 0, "fallbacks": 0, "timed_out": False,
+             "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0}
+    results = {}
+    if not cfg["enabled"]:
+        usage["fallbacks"] = len(reports)
+        return {name: rule_based_reasoning(*pair) for name, pair in reports.items()}, usage
+
+    # A prompt or parsing change alters the module source, and with it every key
+    keys = {name: cache.key("llm_reasoning", [_input_key(*pair, cfg)], None, llm_reasoning_batch) if cache else None
+            for name, pair in reports.items()}
+    misses = []
+    for name in reports:
+        hit, value = cache.get(keys[name]) if cache else (False, None)
+        if hit:
+            results[name] = value
+            usage["cache_hits"] += 1
+        else:
+            misses.append(name)
+
+    if misses:
+        datasets = "\n".join(
+            f"### {name}\n" + json.dumps({"data_quality": reports[name][0], "drift": reports[name][1]},
+                                         sort_keys=True, default=str)
+            for name in misses
+        )
+        prompt = PROMPT_TEMPLATE.format(datasets=datasets)
+        executor = ThreadPoolExecutor(max_workers=1)
+        start = time.monotonic()
+        try:
+            payload = asyncio.run(_generate_with_budget(cfg, prompt, executor))
+            usage["model_calls"] = 1
+            usage["prompt_tokens"] = int(payload.get("prompt_eval_count", 0))
+            usage["completion_tokens"] = int(payload.get("eval_count", 0))
+            answered = _parse_response(payload.get("response", ""), misses)
+        except asyncio.TimeoutError:
+            print(f"LLM reasoning exceeded {cfg['latency_budget_seconds']}s budget. Using rule-based summary.")
+            usage["timed_out"] = True
+            answered = {}
+        except Exception as e:
+            print(f"LLM reasoning failed: {e}. Using rule-based summary.")
+            answered = {}
+        finally:
+            usage["latency_ms"] = round((time.monotonic() - start) * 1000, 2)
+            executor.shutdown(wait=False)
+
+        for name in misses:
+            if name in answered:
+                results[name] = answered[name]
+                if cache:
+                    cache.put(keys[name], answered[name])
+            else:
+                results[name] = rule_based_reasoning(*reports[name])
+                usage["fallbacks"] += 1
+
+    return {name: results[name] for name in reports}, usage
+
+
+def llm_reasoning(data_quality_report, drift_report, reasoning_cfg=None, cache=None):
+    results, usage = llm_reasoning_batch(
+        {"default": (data_quality_report, drift_report)}, reasoning_cfg, cache
+    )
+    return results["default"], usage
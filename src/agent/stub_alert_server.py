@@ -0,0 +1,148 @@
+# ------------------------------------------------------------
+# Stub Alert Server
+# ------------------------------------------------------------
+# Local stand-ins for the alert channels, used to exercise the
+# AlertDispatcher without Slack or a mail relay:
+#   - a webhook endpoint accepting Slack-style {"text": ...}
+#   - a minimal SMTP server (HELO/EHLO, MAIL, RCPT, DATA)
+# Both record what they receive and can fail the first N
+# deliveries (HTTP 500 / SMTP 451) to exercise retries.
+#
+#   python -m src.agent.stub_alert_server --webhook-port 8099 --smtp-port 8025
+# ------------------------------------------------------------
+
+import argparse
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Recorder:
+    """Received messages plus failure injection, shared by both stand-ins."""
+
+    def _init_recorder(self, fail_first=0, delay=0.0):
+        self.received = []
+        self.attempts = 0
+        self.fail_first = fail_first
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def accept(self, message):
+        """Count a delivery attempt; returns False if it should be rejected."""
+        time.sleep(self.delay)
+        with self._lock:
+            self.attempts += 1
+            if self.attempts <= self.fail_first:
+                return False
+            self.received.append(message)
+            return True
+
+
+class StubWebhookServer(_Recorder, ThreadingHTTPServer):
+    def __init__(self, port=0, fail_first=0, delay=0.0):
+        self._init_recorder(fail_first, delay)
+        super().__init__(("127.0.0.1", port), _WebhookHandler)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.server.accept(body.get("text", "")):
+            self.send_error(500, "Injected failure")
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class StubSMTPServer(_Recorder, socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, fail_first=0, delay=0.0):
+        self._init_recorder(fail_first, delay)
+        super().__init__(("127.0.0.1", port), _SMTPHandler)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self._reply("220 stub-smtp ready")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                self._reply("250 stub-smtp")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(" <>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip(" <>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk.rstrip(b"\r\n") == b".":
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                message = {"from": sender, "to": recipients, "data": b"".join(data).decode(errors="replace")}
+                self._reply("250 OK queued" if self.server.accept(message) else "451 Injected failure")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_stub_webhook(port=0, fail_first=0, delay=0.0):
+    """Start the webhook stand-in in a background thread. Returns (server, url)."""
+    server = _serve(StubWebhookServer(port, fail_first, delay))
+    return server, f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+
+def start_stub_smtp(port=0, fail_first=0, delay=0.0):
+    """Start the SMTP stand-in in a background thread. Returns (server, port)."""
+    server = _serve(StubSMTPServer(port, fail_first, delay))
+    return server, server.server_address[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the webhook and SMTP alert channels.")
+    parser.add_argument("--webhook-port", type=int, default=8099)
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--fail-first", type=int, default=0, help="Reject the first N deliveries per channel")
+    args = parser.parse_args()
+    webhook, url = start_stub_webhook(args.webhook_port, args.fail_first)
+    smtp, smtp_port = start_stub_smtp(args.smtp_port, args.fail_first)
+    print(f"Stub webhook listening on {url}")
+    print(f"Stub SMTP server listening on 127.0.0.1:{smtp_port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"webhook: {len(webhook.received)} received | smtp: {len(smtp.received)} received")
+    except KeyboardInterrupt:
+        pass
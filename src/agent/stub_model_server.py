@@ -0,0 +1,80 @@
+# ------------------------------------------------------------
+# Stub Model Server
+# ------------------------------------------------------------
+# Minimal local stand-in for Ollama's /api/generate endpoint,
+# used to exercise the reasoning agent without a real model.
+# It answers every dataset named in the prompt ("### <name>")
+# with a deterministic reasoning entry and reports token
+# counts like Ollama does. --delay simulates a slow model.
+#
+#   python -m src.agent.stub_model_server --port 11434 --delay 0.5
+# ------------------------------------------------------------
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _reply(prompt):
+    names = re.findall(r"^### (.+)$", prompt, flags=re.MULTILINE)
+    answer = {}
+    for name in names:
+        drifting = "Drift Detected" in prompt.split(f"### {name}", 1)[1].split("###", 1)[0]
+        answer[name] = {
+            "summary": f"Stub analysis of {name}: {'drift present' if drifting else 'no drift'}.",
+            "impact": "Medium" if drifting else "Low",
+            "action": "Review upstream source." if drifting else "None required.",
+        }
+    return json.dumps(answer)
+
+
+def make_handler(delay=0.0):
+    class StubModelHandler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(delay)
+            prompt = body.get("prompt", "")
+            response = _reply(prompt)
+            payload = json.dumps({
+                "model": body.get("model"),
+                "response": response,
+                "done": True,
+                "prompt_eval_count": len(prompt.split()),
+                "eval_count": len(response.split()),
+            }).encode()
+            type(self).requests_served += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StubModelHandler
+
+
+def start_stub_server(port=0, delay=0.0):
+    """Start the stub in a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for an Ollama model server.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.delay))
+    print(f"Stub model server listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,127 @@
+# ------------------------------------------------------------
+# Threshold Replay Engine
+# ------------------------------------------------------------
+# Re-evaluates the verdicts of every recorded run under a grid
+# of candidate thresholds in a single vectorized pass over the
+# stored run statistics (data/history), then scores each
+# candidate against the recorded feedback:
+#   false_alarm  -> the column should NOT have been flagged
+#   missed_drift -> the column should have been flagged
+#   confirmed    -> the flag was correct
+# The source data is never reloaded. Only checks with a live
+# verdict in the pipeline are replayed, on the same statistic
+# that verdict uses:
+#   drift        -> per-column KS p-value
+#   completeness -> whole-frame completeness (FRAME_COLUMN row)
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from src.utils.run_history import FRAME_COLUMN, load_feedback, load_run_statistics
+
+# check -> (statistic, flagged when statistic is "below"/"above" threshold, thresholds.yaml path)
+CHECKS = {
+    "drift": ("p_value", "below", ("drift_detection", "p_value_threshold")),
+    "completeness": ("completeness", "below", ("data_quality", "completeness")),
+}
+
+DEFAULT_CANDIDATES = {
+    "drift": np.round(np.logspace(-4, np.log10(0.5), 60), 6),
+    "completeness": np.round(np.linspace(0.5, 1.0, 51), 4),
+}
+
+
+def replay_verdicts(values, candidates, direction):
+    """
+    Verdict matrix for all runs under all candidate thresholds.
+    Args:
+        values (array): Statistic per (run, column) row, NaN when missing
+        candidates (array): Candidate thresholds
+        direction (str): "below" or "above"
+    Returns:
+        np.ndarray: Boolean matrix of shape (len(candidates), len(values))
+    """
+    values = np.asarray(values, dtype=float)[None, :]
+    candidates = np.asarray(candidates, dtype=float)[:, None]
+    return values < candidates if direction == "below" else values > candidates
+
+
+def _labelled_statistics(stats, feedback, check):
+    """Attach the latest feedback for a check to each (run, column) statistics row."""
+    stats = stats.copy()
+    # main.py compares whole-frame completeness, so per-column null rates are not replayed
+    stats["completeness"] = (1 - stats["null_rate"]).round(6).where(stats["column"] == FRAME_COLUMN)
+    labels = feedback[feedback["check"] == check].drop_duplicates(["run_id", "column"], keep="last")
+    merged = stats.merge(labels[["run_id", "column", "feedback"]], on=["run_id", "column"], how="left")
+    # 1 -> should be flagged, 0 -> should not, NaN -> no feedback
+    merged["truth"] = merged["feedback"].map({"false_alarm": 0, "missed_drift": 1, "confirmed": 1})
+    return merged
+
+
+def evaluate_thresholds(stats, feedback, check="drift", candidates=None,
+                        false_alarm_weight=1.0, missed_weight=1.0):
+    """
+    Score candidate thresholds for one check against the recorded feedback.
+    Returns:
+        pd.DataFrame: One row per candidate with flag, false alarm and missed counts and cost
+    """
+    stat_col, direction, _ = CHECKS[check]
+    candidates = np.asarray(DEFAULT_CANDIDATES[check] if candidates is None else candidates, dtype=float)
+    merged = _labelled_statistics(stats, feedback, check)
+
+    flagged = replay_verdicts(merged[stat_col].to_numpy(dtype=float), candidates, direction)
+    truth = merged["truth"].to_numpy(dtype=float)
+    should_flag = (truth == 1)[None, :]
+    should_not = (truth == 0)[None, :]
+
+    false_alarms = (flagged & should_not).sum(axis=1)
+    missed = (~flagged & should_flag).sum(axis=1)
+    return pd.DataFrame({
+        "threshold": candidates,
+        "flags": flagged.sum(axis=1),
+        "false_alarms": false_alarms,
+        "missed": missed,
+        "cost": false_alarm_weight * false_alarms + missed_weight * missed,
+    })
+
+
+def search_thresholds(thresholds, stats=None, feedback=None, checks=None, candidates=None):
+    """
+    Pick, per check, the candidate threshold with the lowest feedback cost.
+    Ties are broken towards the currently configured threshold.
+    Returns:
+        dict: check -> {"current", "best", "false_alarms", "missed", "labelled_runs"}
+    """
+    stats = load_run_statistics() if stats is None else stats
+    feedback = load_feedback() if feedback is None else feedback
+    candidates = candidates or {}
+    results = {}
+
+    for check in checks or CHECKS:
+        section, key = CHECKS[check][2]
+        current = thresholds.get(section, {}).get(key)
+        labelled = int((feedback["check"] == check).sum()) if len(feedback) else 0
+        if stats.empty or not labelled:
+            results[check] = {"current": current, "best": current, "false_alarms": None,
+                              "missed": None, "labelled_runs": labelled}
+            continue
+
+        scores = evaluate_thresholds(stats, feedback, check, candidates.get(check))
+        distance = (scores["threshold"] - current).abs() if current is not None else 0
+        best = scores.assign(distance=distance).sort_values(["cost", "distance"]).iloc[0]
+        results[check] = {
+            "current": current,
+            "best": float(best["threshold"]),
+            "false_alarms": int(best["false_alarms"]),
+            "missed": int(best["missed"]),
+            "labelled_runs": labelled,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    from src.ingest.ingest_manager import load_thresholds
+
+    for check, result in search_thresholds(load_thresholds()).items():
+        print(f"{check}: {result}")
@@ -1,47 +1,89 @@
 # This script will contain the logic for detecting anomalies in data.
 
-import pandas as pd
+import numpy as np
+from sklearn import config_context
 from sklearn.ensemble import IsolationForest
 
+from src.utils.stage_input import StageInput, array_chunks, chunked_quantile
+
+# Scoring is chunked to this many MB of temporaries instead of scoring every row at once
+SCORING_WORKING_MEMORY_MB = 4
+# Each tree only sees max_samples (256) rows, so the forest is fit on a uniform sample
+# of at most this many rows instead of a full copy of the column
+FIT_SAMPLE_ROWS = 100_000
+
+
+def _fit_sample(inputs, col, n_rows, rng):
+    """Non-null values at (up to) FIT_SAMPLE_ROWS uniformly drawn row positions."""
+    picks = np.unique(rng.integers(0, n_rows, FIT_SAMPLE_ROWS)) if n_rows > FIT_SAMPLE_ROWS else None
+    parts, offset = [], 0
+    for chunk in inputs.chunks(col)():
+        start, offset = offset, offset + len(chunk)
+        if picks is not None:
+            lo, hi = np.searchsorted(picks, [start, offset])
+            chunk = chunk[picks[lo:hi] - start]
+        parts.append(chunk[~np.isnan(chunk)])
+    sample = np.concatenate(parts) if parts else np.empty(0)
+    return sample.astype(np.float32).reshape(-1, 1)
+
+
 def detect_anomalies(df, numerical_cols, contamination=0.05):
     """
     Detect anomalies in numerical columns using Isolation Forest.
     Args:
-        df (pd.DataFrame): Input dataframe
+        df (pd.DataFrame | StageInput): Input data (read, never copied or modified)
         numerical_cols (list): List of numerical column names
         contamination (float): Percentage of data expected to be anomalous (0.01 - 0.1)
     Returns:
-        dict: Column-wise anomaly summary and anomaly-tagged dataframe
+        dict: Column-wise anomaly summary,
+        dict: Column -> {"flags": bool array, "scores": float32 array} aligned with the
+              input rows (rows with a null value are unflagged with a NaN score)
     """
     print("Running Anomaly Detection...")
+    inputs = StageInput.wrap(df)
+    n_rows = len(inputs)
     anomalies_report = {}
-    df_anomaly = df.copy()
+    side_arrays = {}
 
     try:
         for col in numerical_cols:
-            if col not in df.columns:
+            if not inputs.has(col):
                 continue
 
-            # Convert to numeric and drop NaNs
-            series = pd.to_numeric(df[col], errors="coerce").dropna().values.reshape(-1, 1)
+            # Initialize Isolation Forest; lower score = more anomalous.
+            # The contamination cut-off is applied below on the scores we already have,
+            # instead of letting fit() score every row a second time.
+            sample = _fit_sample(inputs, col, n_rows, np.random.default_rng(42))
+            if len(sample) == 0:
+                continue
+            iso = IsolationForest(contamination="auto", random_state=42)
+            iso.fit(sample)
+            del sample
 
-            # Initialize Isolation Forest
-            iso = IsolationForest(contamination=contamination, random_state=42)
-            preds = iso.fit_predict(series)
+            # Score chunk by chunk straight into the float32 side array
+            scores = np.full(n_rows, np.nan, dtype=np.float32)
+            offset = 0
+            with config_context(working_memory=SCORING_WORKING_MEMORY_MB):
+                for chunk in inputs.chunks(col)():
+                    valid = ~np.isnan(chunk)
+                    if valid.any():
+                        part = scores[offset:offset + len(chunk)]
+                        part[valid] = iso.score_samples(chunk[valid].astype(np.float32).reshape(-1, 1))
+                    offset += len(chunk)
 
-            # Create anomaly flag
-            mask = pd.Series(preds, index=df.index[:len(preds)])
-            df_anomaly[f"{col}_Anomaly"] = mask.map({1: 0, -1: 1})  # 1 → anomaly detected
+            valid = ~np.isnan(scores)
+            offset_score = chunked_quantile(array_chunks(scores), contamination)
+            flags = scores < offset_score  # same cut-off as predict() == -1; NaN scores are never flagged
+            side_arrays[col] = {"flags": flags, "scores": scores}
 
             anomalies_report[col] = {
-                "anomalies_detected": int(df_anomaly[f"{col}_Anomaly"].sum()),
-                "percentage": round(df_anomaly[f"{col}_Anomaly"].mean() * 100, 2)
+                "anomalies_detected": int(flags.sum()),
+                "percentage": round(flags.sum() / valid.sum() * 100, 2)
             }
 
         print("Anomaly Detection Complete.")
-        return anomalies_report, df_anomaly
+        return anomalies_report, side_arrays
 
     except Exception as e:
         print(f"Error in anomaly detection: {e}")
-        return {}, df
-
+        return {}, {}
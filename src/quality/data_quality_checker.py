@@ -1,13 +1,24 @@
 # This script will contain the logic for checking data quality.
 
-import pandas as pd
+import numpy as np
+
+from src.utils.stage_input import duplicated_rows, row_hashes
+
 
 def calculate_quality_metrics(df):
     print("Calculating Data Quality Metrics...")
     total_cells = df.shape[0] * df.shape[1]
+    # Column by column, so no frame-sized boolean temporaries are built
+    null_cells = sum(int(df[col].isna().sum()) for col in df.columns)
+    numeric_cols = df.select_dtypes("number").columns
+    # Nulls are never valid numbers: pd.NA in nullable (Int64) columns counts like NaN
+    validity = [df[col].ge(0).to_numpy(dtype=bool, na_value=False).mean() for col in numeric_cols] if len(df) else []
+    # Rows sharing a hash are compared by value, so only true duplicates count
+    duplicates = int(duplicated_rows(row_hashes(df), lambda positions: df.iloc[positions]).sum())
+    # Empty frames (e.g. a failed load) give NaN metrics instead of dividing by zero
     metrics = {
-        "completeness": round(1 - df.isnull().sum().sum() / total_cells, 3),
-        "uniqueness": round(1 - (df.duplicated().sum() / len(df)), 3),
-        "numeric_validity": round((df.select_dtypes("number") >= 0).mean().mean(), 3)
+        "completeness": round(1 - null_cells / total_cells, 3) if total_cells else float("nan"),
+        "uniqueness": round(1 - (duplicates / len(df)), 3) if len(df) else float("nan"),
+        "numeric_validity": round(float(np.mean(validity)) if validity else float("nan"), 3)
     }
     return metrics
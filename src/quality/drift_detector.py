@@ -1,15 +1,274 @@
 # This script will contain the logic for detecting data drift.
 
-from scipy.stats import ks_2samp
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp, kstwo, kstwobign
 
-def detect_drift(df1, df2, numerical_cols):
-    print("Running Drift Detection...")
-    drift_report = {}
+from src.utils.stage_input import StageInput
+
+# Rows processed per step by the chunked KS test and window counting
+CHUNK_ROWS = 250_000
+EXACT_KS_MAX_N = 10_000
+# PSI is smoothed with this pseudo-count per bin and left NaN for windows with fewer
+# than PSI_MIN_ROWS_PER_BIN rows per bin, where sampling noise alone exceeds ~0.1
+PSI_PSEUDO_COUNT = 0.5
+PSI_MIN_ROWS_PER_BIN = 10
+
+
+def _ks_2samp(a, b):
+    """
+    Two-sided two-sample KS test.
+    Small samples go to scipy (exact p-value); large ones evaluate both empirical
+    CDFs chunk by chunk with scipy's asymptotic p-value, keeping only the two
+    sorted samples in memory.
+    """
+    if max(len(a), len(b)) <= EXACT_KS_MAX_N:
+        result = ks_2samp(a, b)
+        return float(result.statistic), float(result.pvalue)
+    a, b = np.sort(a), np.sort(b)
+    d = 0.0
+    for points in (a, b):
+        for start in range(0, len(points), CHUNK_ROWS):
+            chunk = points[start:start + CHUNK_ROWS]
+            cdf_a = np.searchsorted(a, chunk, side="right") / len(a)
+            cdf_b = np.searchsorted(b, chunk, side="right") / len(b)
+            d = max(d, float(np.abs(cdf_a - cdf_b).max()))
+    m, n = sorted([float(len(a)), float(len(b))], reverse=True)
+    p = float(np.clip(kstwo.sf(d, np.round(m * n / (m + n))), 0, 1))
+    return d, p
+
+
+def drift_statistics(df1, df2, numerical_cols):
+    """Raw KS statistic and p-value per column (None when the test cannot run)."""
+    current, reference = StageInput.wrap(df1), StageInput.wrap(df2)
+    stats = {}
     for col in numerical_cols:
         try:
-            stat, p = ks_2samp(df1[col].dropna().astype(float),
-                               df2[col].dropna().astype(float))
-            drift_report[col] = " Drift Detected" if p < 0.05 else "✅ Stable"
+            stat, p = _ks_2samp(current.valid_values(col), reference.valid_values(col))
+            stats[col] = {"ks_statistic": stat, "p_value": p}
         except Exception:
+            stats[col] = None
+    return stats
+
+
+def drift_verdicts(stats, p_value_threshold=0.05):
+    """Turn raw drift statistics into the per-column drift report."""
+    drift_report = {}
+    for col, col_stats in stats.items():
+        if not col_stats:
             drift_report[col] = "N/A"
+        else:
+            drift_report[col] = " Drift Detected" if col_stats["p_value"] < p_value_threshold else "✅ Stable"
     return drift_report
+
+
+def detect_drift(df1, df2, numerical_cols, p_value_threshold=0.05):
+    print("Running Drift Detection...")
+    return drift_verdicts(drift_statistics(df1, df2, numerical_cols), p_value_threshold)
+
+
+def _bin_edges(values, usable, codes, n_groups, bins, rows_per_group=500, min_sample_rows=100_000):
+    """
+    Quantile bin edges per group, shared by every window of that group, as an
+    (n_groups, bins - 1) table (None when the column has no usable values).
+    Edges are estimated on a uniform sample of about rows_per_group rows per group;
+    groups too small to show up in that sample use all of their rows instead.
+    Groups without any values get NaN edges (they are never binned).
+    """
+    rate = max(min_sample_rows, rows_per_group * n_groups) / max(len(values), 1)
+    if rate >= 1:
+        rows = np.flatnonzero(usable)
+    else:
+        rng = np.random.default_rng(42)
+        rows = np.flatnonzero(usable & (rng.random(len(values), dtype=np.float32) < rate))
+        if codes is not None:
+            sampled = np.bincount(codes[rows], minlength=n_groups)
+            sparse = np.flatnonzero(sampled < bins)
+            if len(sparse):
+                rows = np.union1d(rows, np.flatnonzero(usable & np.isin(codes, sparse)))
+    sample = values[rows]
+    keep = ~np.isnan(sample)
+    if not keep.any():
+        return None
+    sample = sample[keep]
+    quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+    edges = np.full((n_groups, len(quantiles)), np.nan)
+    if codes is None:
+        edges[0] = np.quantile(sample, quantiles)
+        return edges
+    sample_codes = codes[rows][keep]
+    order = np.argsort(sample_codes, kind="stable")
+    bounds = np.searchsorted(sample_codes[order], np.arange(n_groups + 1))
+    for group in np.flatnonzero(np.diff(bounds)):
+        edges[group] = np.quantile(sample[order[bounds[group]:bounds[group + 1]]], quantiles)
+    return edges
+
+
+def _assign_bins(edges, values, codes):
+    """Bin of each value against its own group's row of the edge table."""
+    if codes is None:
+        return np.searchsorted(edges[0], values, side="right")
+    out = np.empty(len(values), dtype=np.int64)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(edges) + 1))
+    for group in np.flatnonzero(np.diff(bounds)):
+        rows = order[bounds[group]:bounds[group + 1]]
+        out[rows] = np.searchsorted(edges[group], values[rows], side="right")
+    return out
+
+
+def _day_index(dates):
+    """Days since the earliest date as int32 (-1 where the date is missing), and that date."""
+    day = np.full(len(dates), -1, dtype=np.int32)
+    start = None
+    for offset in range(0, len(dates), CHUNK_ROWS):
+        chunk = pd.to_datetime(dates[offset:offset + CHUNK_ROWS], errors="coerce").to_numpy(dtype="datetime64[D]")
+        valid = chunk[~np.isnat(chunk)]
+        if len(valid):
+            start = valid.min() if start is None else min(start, valid.min())
+    if start is None:
+        return day, None
+    for offset in range(0, len(dates), CHUNK_ROWS):
+        chunk = pd.to_datetime(dates[offset:offset + CHUNK_ROWS], errors="coerce").to_numpy(dtype="datetime64[D]")
+        has_date = ~np.isnat(chunk)
+        day[offset:offset + len(chunk)][has_date] = (chunk[has_date] - start).astype(np.int32)
+    return day, pd.Timestamp(start)
+
+
+def windowed_drift_statistics(df, numerical_cols, date_col="Date", window_days=7, reference_days=90,
+                              step_days=1, group_col=None, bins=20):
+    """
+    Raw drift time series comparing a current window against the reference window before it.
+    Each column is binned once (quantile edges per group) and counted per (group, day, bin)
+    in row chunks; window
+    histograms are then differences of day-wise prefix sums, so advancing a window never
+    re-sorts data.
+    The KS statistic is computed on the binned CDFs (asymptotic p-value), alongside a
+    smoothed PSI (NaN when the window is too small for PSI to be meaningful).
+    Args:
+        df (pd.DataFrame | StageInput): Input data with a date column
+        numerical_cols (list): Columns to monitor
+        window_days (int): Length of the current window in days
+        reference_days (int): Length of the reference window preceding it
+        step_days (int): Window advance; 1 = sliding, window_days = tumbling
+        group_col (str): Optional column (e.g. "Symbol") for per-ticker series
+        bins (int): Number of quantile bins per column
+    Returns:
+        pd.DataFrame: One row per (window end, group, column), without verdicts
+    """
+    print("Running Windowed Drift Detection...")
+    inputs = StageInput.wrap(df)
+    if not inputs.has(date_col):
+        return pd.DataFrame()
+    day, start = _day_index(inputs.column(date_col))
+    if start is None:
+        return pd.DataFrame()
+    n_days = int(day.max()) + 1
+
+    if group_col:
+        codes, groups = pd.factorize(inputs.column(group_col))
+        codes = codes.astype(np.int32)
+        usable = (day >= 0) & (codes >= 0)
+    else:
+        codes, groups = None, pd.Index(["ALL"])
+        usable = day >= 0
+    n_groups = len(groups)
+
+    # Window end day (inclusive); the reference window sits right before the current one
+    ends = np.arange(reference_days + window_days - 1, n_days, step_days)
+    if len(ends) == 0:
+        return pd.DataFrame()
+    cur_start = ends + 1 - window_days
+    ref_start = cur_start - reference_days
+
+    frames = []
+    for col in numerical_cols:
+        if not inputs.has(col):
+            continue
+        values = inputs.values(col)
+        # Edges are per group: tickers trade at very different price levels, so pooled
+        # edges would put each ticker's values into one or two bins
+        edges = _bin_edges(values, usable, codes, n_groups, bins)
+        if edges is None:
+            continue
+        n_bins = edges.shape[1] + 1
+
+        # Counts per (group, day, bin) with a leading zero day, turned into day-wise prefix
+        # sums in place; chunks are added with np.add.at, so no table-sized temporaries
+        prefix = np.zeros((n_groups, n_days + 1, n_bins), dtype=np.int64)
+        for offset in range(0, len(values), CHUNK_ROWS):
+            chunk = values[offset:offset + CHUNK_ROWS]
+            ok = usable[offset:offset + CHUNK_ROWS] & ~np.isnan(chunk)
+            flat = day[offset:offset + CHUNK_ROWS][ok].astype(np.int64) + 1
+            chunk_codes = None if codes is None else codes[offset:offset + CHUNK_ROWS][ok]
+            if chunk_codes is not None:
+                flat += chunk_codes * (n_days + 1)
+            flat *= n_bins
+            flat += _assign_bins(edges, chunk[ok], chunk_codes)
+            np.add.at(prefix.reshape(-1), flat, 1)
+        np.cumsum(prefix, axis=1, out=prefix)
+
+        current = prefix[:, ends + 1] - prefix[:, cur_start]
+        reference = prefix[:, cur_start] - prefix[:, ref_start]
+        n_cur = current.sum(axis=2)
+        n_ref = reference.sum(axis=2)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p_cur = current / n_cur[..., None]
+            p_ref = reference / n_ref[..., None]
+            ks_stat = np.abs(np.cumsum(p_cur, axis=2) - np.cumsum(p_ref, axis=2)).max(axis=2)
+            eff_n = n_cur * n_ref / (n_cur + n_ref)
+            p_value = kstwobign.sf(np.sqrt(eff_n) * ks_stat)
+            # Smoothed bin shares, so bins empty in one window do not blow PSI up
+            s_cur = (current + PSI_PSEUDO_COUNT) / (n_cur[..., None] + PSI_PSEUDO_COUNT * n_bins)
+            s_ref = (reference + PSI_PSEUDO_COUNT) / (n_ref[..., None] + PSI_PSEUDO_COUNT * n_bins)
+            psi = ((s_cur - s_ref) * np.log(s_cur / s_ref)).sum(axis=2)
+            psi[np.minimum(n_cur, n_ref) < PSI_MIN_ROWS_PER_BIN * n_bins] = np.nan
+
+        frames.append(pd.DataFrame({
+            "window_end": np.tile(start + pd.to_timedelta(ends, unit="D"), n_groups),
+            "group": np.repeat(np.asarray(groups, dtype=object), len(ends)),
+            "column": col,
+            "n_current": n_cur.ravel(),
+            "n_reference": n_ref.ravel(),
+            "ks_statistic": ks_stat.ravel(),
+            "p_value": p_value.ravel(),
+            "psi": psi.ravel(),
+        }))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def windowed_drift_verdicts(series, p_value_threshold=0.05):
+    """Add the per-window drift verdict to a raw drift time series."""
+    if series.empty:
+        return series
+    return series.assign(drift=series["p_value"] < p_value_threshold)
+
+
+def windowed_drift(df, numerical_cols, date_col="Date", window_days=7, reference_days=90,
+                   step_days=1, group_col=None, bins=20, p_value_threshold=0.05):
+    """Drift time series with verdicts; see windowed_drift_statistics for the arguments."""
+    series = windowed_drift_statistics(df, numerical_cols, date_col, window_days, reference_days,
+                                       step_days, group_col, bins)
+    return windowed_drift_verdicts(series, p_value_threshold)
+
+
+def summarize_windowed_drift(series):
+    """Latest verdict and drifting-window count per (group, column) of a drift time series."""
+    if series.empty:
+        return {}
+    summary = {}
+    for (group, col), rows in series.groupby(["group", "column"], sort=False):
+        latest = rows.iloc[-1]
+        key = col if group == "ALL" else f"{group}:{col}"
+        summary[key] = {
+            "latest_window_end": str(latest["window_end"].date()),
+            "latest_p_value": round(float(latest["p_value"]), 4),
+            "latest_drift": bool(latest["drift"]),
+            "drifted_windows": int(rows["drift"].sum()),
+            "windows": int(len(rows)),
+        }
+    return summary
@@ -0,0 +1,195 @@
+# ------------------------------------------------------------
+# Stage Result Cache
+# ------------------------------------------------------------
+# Content-addressed memoization of pipeline stage outputs.
+# Each result is stored under a key built from:
+#   - the fingerprint(s) of the stage input data
+#   - the config / threshold section the stage depends on
+#   - the source code version of the stage function and of
+#     every project module it imports (directly or indirectly)
+# Unchanged inputs reuse the stored result; a config-only
+# change only misses for the stages reading that section.
+# Entries are JSON files, evicted least-recently-used once
+# the entry count or total size limit is exceeded.
+# ------------------------------------------------------------
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.stage_input import HASH_CHUNK_ROWS
+
+CACHE_FORMAT_VERSION = 1
+
+
+def _digest(*parts):
+    """sha256 over a sequence of strings / bytes."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _to_builtin(value):
+    """JSON fallback for numpy scalars / arrays and other report values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def fingerprint_frame(df):
+    """Fingerprint a dataframe by schema, shape and per-row content hashes."""
+    if df is None:
+        return "none"
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c) for c in df.columns], [str(t) for t in df.dtypes], list(df.shape)]).encode())
+    # Hashed one column chunk at a time so only a small block of hashes is alive at once
+    for start in range(0, len(df), HASH_CHUNK_ROWS):
+        chunk = df.iloc[start:start + HASH_CHUNK_ROWS]
+        h.update(pd.util.hash_pandas_object(chunk.index).to_numpy().tobytes())
+        for col in chunk.columns:
+            h.update(pd.util.hash_pandas_object(chunk[col], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def fingerprint_config(section):
+    """Fingerprint a config / threshold section (order-insensitive)."""
+    return _digest(json.dumps(section, sort_keys=True, default=_to_builtin))
+
+
+def _project_dependencies(module):
+    """The module plus every module of the same top-level package it uses, transitively."""
+    package = module.__name__.split(".")[0]
+    seen = {}
+    pending = [module]
+    while pending:
+        mod = pending.pop()
+        if mod.__name__ in seen:
+            continue
+        seen[mod.__name__] = mod
+        for value in vars(mod).values():
+            if inspect.ismodule(value):
+                name = value.__name__
+            else:
+                name = getattr(value, "__module__", None)
+                if not isinstance(name, str) or not (inspect.isfunction(value) or inspect.isclass(value)):
+                    continue
+            if name.split(".")[0] == package and name not in seen and name in sys.modules:
+                pending.append(sys.modules[name])
+    return [seen[name] for name in sorted(seen)]
+
+
+def code_version(func):
+    """
+    Version a stage by the source of the module that defines it and of the project
+    modules it depends on, so a change to a shared helper also invalidates the stage.
+    """
+    try:
+        module = sys.modules[func.__module__]
+        sources = [Path(inspect.getsourcefile(mod)).read_bytes() for mod in _project_dependencies(module)]
+        return _digest(*sources)
+    except (AttributeError, KeyError, TypeError, OSError):
+        return _digest(getattr(func, "__qualname__", repr(func)))
+
+
+class ResultCache:
+    """Size-bounded, LRU-evicted store of stage results keyed by content."""
+
+    def __init__(self, cache_dir="data/cache", max_entries=256, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, stage, fingerprints, config=None, func=None):
+        """Build the cache key for a stage run."""
+        digest = _digest(
+            CACHE_FORMAT_VERSION,
+            stage,
+            *fingerprints,
+            fingerprint_config(config),
+            code_version(func) if func is not None else "",
+        )
+        return f"{stage}-{digest[:32]}"
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def contains(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Return (hit, value); a hit refreshes the entry's LRU position."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)["value"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return False, None
+        os.utime(path)
+        return True, value
+
+    def put(self, key, value):
+        """Store a JSON-serializable stage result and evict if over budget."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "value": value}, f, default=_to_builtin)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def invalidate(self, stage=None):
+        """Drop all entries, or only those of one stage. Returns the count removed."""
+        pattern = f"{stage}-*.json" if stage else "*.json"
+        removed = 0
+        for path in self.cache_dir.glob(pattern):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _evict(self):
+        """Remove least-recently-used entries until within entry and size limits."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def run(self, stage, fingerprints, config, func, *args, **kwargs):
+        """
+        Memoize func(*args, **kwargs) for a stage.
+        Returns:
+            tuple: (result, hit)
+        """
+        key = self.key(stage, fingerprints, config, func)
+        hit, value = self.get(key)
+        if hit:
+            print(f"Cache hit for stage '{stage}'. Skipping recomputation.")
+            return value, True
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return value, False
+
+
+# Entry point when run directly: invalidate the cache (optionally for one stage)
+if __name__ == "__main__":
+    stage = sys.argv[1] if len(sys.argv) > 1 else None
+    removed = ResultCache().invalidate(stage)
+    print(f"Removed {removed} cached result(s){f' for stage {stage}' if stage else ''}.")
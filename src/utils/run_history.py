@@ -0,0 +1,88 @@
+# ------------------------------------------------------------
+# Run History Module
+# ------------------------------------------------------------
+# Keeps the raw per-column statistics of every pipeline run
+# (drift p-values, anomaly rates, null rates) and the human
+# feedback on its verdicts, so thresholds can be replayed
+# over history without touching the source data again.
+# Whole-frame statistics (the completeness the live check
+# compares) are stored under the FRAME_COLUMN pseudo column.
+# ------------------------------------------------------------
+
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from src.utils.file_handler import ensure_dir_exists
+
+RUN_STATS_PATH = "data/history/run_statistics.csv"
+FEEDBACK_PATH = "data/history/feedback.csv"
+
+RUN_STATS_COLUMNS = ["run_id", "timestamp", "column", "p_value", "ks_statistic", "anomaly_rate", "null_rate"]
+FEEDBACK_COLUMNS = ["run_id", "column", "check", "feedback", "timestamp"]
+FEEDBACK_LABELS = ("false_alarm", "missed_drift", "confirmed")
+FRAME_COLUMN = "__frame__"
+
+
+def _append_rows(rows, columns, path):
+    """Append rows to a CSV file, writing the header on first use."""
+    ensure_dir_exists(os.path.dirname(path))
+    pd.DataFrame(rows, columns=columns).to_csv(
+        path, mode="a", header=not os.path.exists(path), index=False
+    )
+
+
+def column_null_rates(df, columns):
+    """Fraction of null values per column."""
+    return {col: float(df[col].isna().mean()) for col in columns if col in df.columns}
+
+
+def record_run_statistics(run_id, drift_stats, anomaly_report, null_rates, completeness=None,
+                          path=RUN_STATS_PATH):
+    """
+    Append one row per column with the raw statistics of a run, plus a FRAME_COLUMN
+    row holding the whole-frame null rate (1 - completeness) when it is given.
+    """
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    columns = list(dict.fromkeys([*drift_stats, *anomaly_report, *null_rates]))
+    rows = []
+    for col in columns:
+        drift = drift_stats.get(col) or {}
+        anomaly = anomaly_report.get(col) or {}
+        rows.append({
+            "run_id": run_id,
+            "timestamp": timestamp,
+            "column": col,
+            "p_value": drift.get("p_value"),
+            "ks_statistic": drift.get("ks_statistic"),
+            "anomaly_rate": anomaly["percentage"] / 100 if "percentage" in anomaly else None,
+            "null_rate": null_rates.get(col),
+        })
+    if completeness is not None:
+        rows.append({"run_id": run_id, "timestamp": timestamp, "column": FRAME_COLUMN,
+                     "null_rate": 1 - float(completeness)})
+    _append_rows(rows, RUN_STATS_COLUMNS, path)
+    print(f"Run statistics recorded -> {path}")
+
+
+def record_feedback(run_id, column, feedback, check="drift", path=FEEDBACK_PATH):
+    """Record human feedback on one verdict of a past run."""
+    if feedback not in FEEDBACK_LABELS:
+        raise ValueError(f"Unknown feedback '{feedback}'. Expected one of {FEEDBACK_LABELS}.")
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    _append_rows([[run_id, column, check, feedback, timestamp]], FEEDBACK_COLUMNS, path)
+
+
+def load_run_statistics(path=RUN_STATS_PATH):
+    """Load all recorded run statistics (empty frame if none)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=RUN_STATS_COLUMNS)
+    return pd.read_csv(path)
+
+
+def load_feedback(path=FEEDBACK_PATH):
+    """Load all recorded feedback (empty frame if none)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=FEEDBACK_COLUMNS)
+    return pd.read_csv(path)
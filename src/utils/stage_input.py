@@ -0,0 +1,294 @@
+# ------------------------------------------------------------
+# Stage Input Contract
+# ------------------------------------------------------------
+# Shared, read-only handoff of a loaded frame between the
+# ingest, correction, quality, drift and anomaly stages.
+# Stages read one column at a time as NumPy arrays instead of
+# copying the frame:
+#   - float64 columns are returned as read-only views
+#   - other numeric / text columns are converted on demand and
+#     released by the caller after use (nothing is cached)
+#   - an optional row mask (e.g. rows kept after correction)
+#     is applied per column, never to the whole frame
+#   - optional sparse patches (corrected cells as positions +
+#     values) are overlaid on read, so a correction stage does
+#     not have to copy the columns it fixes
+# Columns can also be read in row chunks, e.g. for the exact
+# chunked quantile below.
+# ------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+_HASH_MULTIPLIER = np.uint64(1_000_003)
+HASH_CHUNK_ROWS = 250_000
+_SIGN_BIT = np.uint64(1 << 63)
+_DIGIT_BITS = 16
+
+
+def _readonly(arr):
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def row_hashes(df, chunk_rows=HASH_CHUNK_ROWS):
+    """
+    Per-row uint64 hash of a frame (index excluded).
+    Rows are hashed in chunks and columns combined one at a time, so the only
+    frame-length allocation is the returned array.
+    """
+    combined = np.empty(len(df), dtype=np.uint64)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        h = np.zeros(len(chunk), dtype=np.uint64)
+        for col in chunk.columns:
+            h *= _HASH_MULTIPLIER
+            h ^= pd.util.hash_pandas_object(chunk[col], index=False).to_numpy()
+        combined[start:start + len(chunk)] = h
+    return combined
+
+
+def duplicated_rows(hashes, take):
+    """
+    Mark every repeat of an earlier row (keep="first" semantics), found by hash and
+    confirmed by value. Rows whose hash repeats are only candidates: take(positions)
+    returns them as a frame and DataFrame.duplicated decides, so hash collisions and
+    values hashed alike (1 and "1" in an object column) never count as duplicates.
+    """
+    duplicated = np.zeros(len(hashes), dtype=bool)
+    if len(hashes) < 2:
+        return duplicated
+    sorted_hashes = np.sort(hashes)
+    repeated = np.unique(sorted_hashes[1:][sorted_hashes[1:] == sorted_hashes[:-1]])
+    del sorted_hashes
+    if len(repeated) == 0:
+        return duplicated
+    candidates = np.flatnonzero(pd.Series(hashes, copy=False).isin(repeated).to_numpy())
+    duplicated[candidates] = take(candidates).duplicated(keep="first").to_numpy()
+    return duplicated
+
+
+def _as_float(values):
+    """Float64 NumPy values of a Series; a view when it already is float64."""
+    if values.dtype == np.float64:
+        return values.to_numpy()
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _order_keys(values):
+    """Non-NaN floats as uint64 keys that sort in the same order as the values."""
+    bits = values[~np.isnan(values)].astype(np.float64).view(np.uint64)
+    return bits ^ ((np.uint64(0) - (bits >> np.uint64(63))) | _SIGN_BIT)
+
+
+def _from_order_key(key):
+    key = np.uint64(key)
+    bits = key ^ _SIGN_BIT if key & _SIGN_BIT else ~key
+    return float(np.array([bits], dtype=np.uint64).view(np.float64)[0])
+
+
+def _select(chunks, k, gather_below=HASH_CHUNK_ROWS):
+    """k-th smallest (0-based) non-NaN value, by radix selection over 16-bit key digits."""
+    prefix, shift = np.uint64(0), 64
+    while shift > 0:
+        shift -= _DIGIT_BITS
+        high = np.uint64(shift + _DIGIT_BITS)
+        hist = np.zeros(1 << _DIGIT_BITS, dtype=np.int64)
+        for chunk in chunks():
+            keys = _order_keys(chunk)
+            if high < 64:
+                keys = keys[(keys >> high) == prefix]
+            hist += np.bincount(((keys >> np.uint64(shift)) & np.uint64(0xFFFF)).astype(np.intp),
+                                minlength=1 << _DIGIT_BITS)
+        below = np.cumsum(hist)
+        digit = int(np.searchsorted(below, k, side="right"))
+        k -= int(below[digit - 1]) if digit else 0
+        prefix = (prefix << np.uint64(_DIGIT_BITS)) | np.uint64(digit)
+        if 0 < shift and hist[digit] <= gather_below:
+            # Few enough candidates left to select among them directly
+            level = np.uint64(shift)
+            candidates = np.concatenate([keys[(keys >> level) == prefix]
+                                         for keys in map(_order_keys, chunks())])
+            return _from_order_key(np.partition(candidates, k)[k])
+    return _from_order_key(prefix)
+
+
+def chunked_quantile(chunks, q):
+    """
+    Exact q-quantile of the non-NaN values produced by chunks(), with np.quantile's
+    linear interpolation. chunks is a callable returning a fresh iterable of arrays;
+    only one chunk and a 64K-bucket histogram are alive at a time.
+    """
+    n = sum(int(np.count_nonzero(~np.isnan(chunk))) for chunk in chunks())
+    if n == 0:
+        return np.nan
+    h = (n - 1) * q
+    lo = int(np.floor(h))
+    t = h - lo
+    a = _select(chunks, lo)
+    if t == 0:
+        return a
+    # The next order statistic: a again if it repeats, else the smallest larger value
+    at_most = sum(int(np.count_nonzero(chunk <= a)) for chunk in chunks())
+    b = a if at_most > lo + 1 else min(float(chunk[chunk > a].min()) for chunk in chunks() if (chunk > a).any())
+    diff = b - a
+    return b - diff * (1 - t) if t >= 0.5 else a + diff * t
+
+
+def chunked_mean(chunks):
+    """Mean of the non-NaN values produced by chunks()."""
+    total, count = 0.0, 0
+    for chunk in chunks():
+        valid = chunk[~np.isnan(chunk)]
+        total += float(valid.sum(dtype=np.float64))
+        count += len(valid)
+    return total / count if count else np.nan
+
+
+def _restore_dtype(arr, dtype):
+    """Patched values back in the column's dtype when they fit it (numpy match, or Int64 / str)."""
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) or arr.dtype == dtype:
+        return pd.array(arr, dtype=dtype)
+    return arr
+
+
+def array_chunks(values, chunk_rows=HASH_CHUNK_ROWS):
+    """chunks() callable over a plain array, for chunked_quantile / chunked_mean."""
+    return lambda: (values[start:start + chunk_rows] for start in range(0, len(values), chunk_rows))
+
+
+class StageInput:
+    """
+    Read-only, column-wise view of a frame, optionally restricted to a row mask and
+    overlaid with sparse patches: column -> (sorted row positions, values).
+    """
+
+    def __init__(self, df, rows=None, patches=None):
+        self.df = df
+        rows = None if rows is None else np.asarray(rows, dtype=bool)
+        self.rows = None if rows is None or rows.all() else _readonly(rows)
+        self.patches = {} if patches is None else patches
+
+    @classmethod
+    def wrap(cls, data):
+        """Accept either a StageInput or a plain DataFrame."""
+        return data if isinstance(data, StageInput) else cls(data)
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    def __len__(self):
+        return len(self.df) if self.rows is None else int(self.rows.sum())
+
+    def has(self, col):
+        return col in self.df.columns
+
+    def _dtype(self, col, as_float):
+        if as_float:
+            return np.dtype(np.float64)
+        dtype = self.df[col].dtype
+        # Extension columns (Int64, Float64, str) hold pd.NA, so their raw chunks are objects
+        base = np.dtype(object) if isinstance(dtype, pd.api.extensions.ExtensionDtype) else dtype
+        return np.result_type(base, self.patches[col][1].dtype) if col in self.patches else base
+
+    def _chunks(self, col, as_float, chunk_rows, rows=True):
+        series = self.df[col]
+        patch = self.patches.get(col)
+        dtype = self._dtype(col, as_float)
+        for start in range(0, len(series), chunk_rows):
+            stop = min(start + chunk_rows, len(series))
+            part = series.iloc[start:stop]
+            arr = _as_float(part) if as_float else part.to_numpy()
+            if patch is not None:
+                lo, hi = np.searchsorted(patch[0], [start, stop])
+                if hi > lo:
+                    arr = arr.astype(dtype, copy=True)
+                    arr[patch[0][lo:hi] - start] = patch[1][lo:hi]
+            if rows and self.rows is not None:
+                arr = arr[self.rows[start:stop]]
+            yield arr
+
+    def _gather(self, col, as_float, rows=True):
+        """One new array with the patched values of the selected rows, filled chunk by chunk."""
+        out = np.empty(len(self) if rows else len(self.df), dtype=self._dtype(col, as_float))
+        filled = 0
+        for arr in self._chunks(col, as_float, HASH_CHUNK_ROWS, rows):
+            out[filled:filled + len(arr)] = arr
+            filled += len(arr)
+        return out
+
+    def codes(self, col):
+        """
+        int32 codes of a column over all rows (row mask ignored, -1 for nulls), in order
+        of first appearance like pd.factorize, but factorized chunk by chunk so no
+        frame-sized hash table is built.
+        """
+        codes = np.empty(len(self.df), dtype=np.int32)
+        lookup = {}
+        filled = 0
+        for arr in self._chunks(col, False, HASH_CHUNK_ROWS, rows=False):
+            local, uniques = pd.factorize(arr)
+            mapping = np.array([lookup.setdefault(value, len(lookup)) for value in uniques] + [-1], dtype=np.int32)
+            codes[filled:filled + len(arr)] = mapping[local]
+            filled += len(arr)
+        return _readonly(codes), pd.Index(list(lookup), dtype=object)
+
+    def chunks(self, col, chunk_rows=HASH_CHUNK_ROWS):
+        """chunks() callable yielding the column as float64 chunks (patched, row mask applied)."""
+        return lambda: self._chunks(col, True, chunk_rows)
+
+    def column(self, col):
+        """Raw column values (any dtype) for the selected rows."""
+        if col not in self.patches and self.rows is None:
+            return _readonly(self.df[col].to_numpy())
+        return _readonly(self._gather(col, as_float=False))
+
+    def values(self, col):
+        """Column as a read-only float64 array; a view when it is float64, unpatched and unmasked."""
+        if col not in self.patches and self.rows is None:
+            return _readonly(_as_float(self.df[col]))
+        return _readonly(self._gather(col, as_float=True))
+
+    def valid_values(self, col):
+        """Non-null values of a column; no copy when a float64 view has no nulls."""
+        if col not in self.patches and self.rows is None:
+            arr = self.values(col)
+            missing = np.isnan(arr)
+            return arr[~missing] if missing.any() else arr
+        out = np.empty(len(self), dtype=np.float64)
+        filled = 0
+        for arr in self._chunks(col, True, HASH_CHUNK_ROWS):
+            arr = arr[~np.isnan(arr)]
+            out[filled:filled + len(arr)] = arr
+            filled += len(arr)
+        return _readonly(out[:filled])
+
+    def _with_patches(self, frame, positions):
+        """Overlay the patches on a frame holding the rows at the given df positions."""
+        for col, (patch_pos, patch_values) in self.patches.items():
+            idx = np.minimum(np.searchsorted(patch_pos, positions), len(patch_pos) - 1)
+            hit = patch_pos[idx] == positions
+            if not hit.any():
+                continue
+            arr = frame[col].to_numpy().astype(self._dtype(col, as_float=False), copy=True)
+            arr[hit] = patch_values[idx[hit]]
+            frame[col] = _restore_dtype(arr, frame[col].dtype)
+        return frame
+
+    def take(self, positions):
+        """DataFrame of the rows at the given df positions (row mask ignored), patches applied."""
+        positions = np.asarray(positions, dtype=np.int64)
+        return self._with_patches(self.df.iloc[positions], positions)
+
+    def frame(self):
+        """Materialize the selected rows as a DataFrame (copies patched columns and masked rows)."""
+        df = self.df
+        if self.patches:
+            df = df.copy(deep=False)
+            for col in self.patches:
+                df[col] = _restore_dtype(self._gather(col, as_float=False, rows=False), df[col].dtype)
+        return df if self.rows is None else df[self.rows]
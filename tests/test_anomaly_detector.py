@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from src.quality.anomaly_detector import FIT_SAMPLE_ROWS, detect_anomalies
+from src.utils.stage_input import StageInput
+
+
+def frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100, 5, n)
+    values[:20] = 1_000 + np.arange(20)
+    values[50:60] = np.nan
+    return pd.DataFrame({"Close": values, "Volume": rng.integers(0, 1_000, n)})
+
+
+def test_side_arrays_align_with_input_rows():
+    df = frame(2_000)
+    report, side = detect_anomalies(df, ["Close", "Volume", "Missing"], contamination=0.05)
+
+    assert set(report) == set(side) == {"Close", "Volume"}
+    flags, scores = side["Close"]["flags"], side["Close"]["scores"]
+    assert flags.dtype == bool and scores.dtype == np.float32 and len(flags) == len(df)
+    assert np.isnan(scores[50:60]).all() and not flags[50:60].any()
+    assert flags[:20].all()
+    assert report["Close"]["anomalies_detected"] == int(flags.sum())
+    assert abs(report["Close"]["percentage"] - 5.0) < 0.5
+
+
+def test_row_mask_and_patches_are_respected():
+    df = frame(1_000)
+    rows = np.ones(len(df), dtype=bool)
+    rows[:10] = False
+    inputs = StageInput(df, rows=rows, patches={"Close": (np.array([10, 11]), np.array([100.0, 100.0]))})
+    _, side = detect_anomalies(inputs, ["Close"])
+    flags = side["Close"]["flags"]
+    assert len(flags) == len(df) - 10
+    assert not flags[:2].any() and flags[2:10].all()
+
+
+def test_large_columns_fit_on_a_sample():
+    df = frame(FIT_SAMPLE_ROWS * 3, seed=1)
+    report, side = detect_anomalies(df, ["Close"], contamination=0.02)
+    assert side["Close"]["flags"][:20].all()
+    assert abs(report["Close"]["percentage"] - 2.0) < 0.1
@@ -0,0 +1,254 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agent.auto_corrector import auto_correct
+from src.quality.data_quality_checker import calculate_quality_metrics
+
+NUMERICAL_COLS = ["Open", "Close", "Volume"]
+
+
+def make_frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n) % 30, unit="D"),
+        "Symbol": np.array(["AAPL", "MSFT", "GOOG", "AMZN"], dtype=object)[np.arange(n) % 4],
+        "Open": rng.normal(100, 10, n).round(2),
+        "Close": rng.normal(100, 10, n).round(2),
+        "Volume": rng.integers(1_000, 100_000, n),
+    })
+
+
+def run(df, cfg=None):
+    report, corrected, changes = auto_correct(df, calculate_quality_metrics(df), NUMERICAL_COLS, cfg)
+    return report, corrected.frame(), changes
+
+
+def assert_revalidated(report, corrected):
+    """Metrics from changed-row revalidation must equal a full re-check of the output."""
+    assert report["revalidation"]["metrics_after"] == calculate_quality_metrics(corrected)
+
+
+def test_clip_impute_and_drop_duplicates():
+    df = make_frame()
+    df.loc[[3, 17], "Open"] = -5.0
+    df.loc[[8], "Volume"] = -1
+    df.loc[[5, 40, 41], "Open"] = np.nan
+    df = pd.concat([df, df.iloc[[10, 11]]], ignore_index=True)
+    original = df.copy()
+
+    report, corrected, changes = run(df)
+
+    pd.testing.assert_frame_equal(df, original)
+    assert report["rows_dropped"] == 2
+    assert report["fixes"]["clipped"] == {"Open": 2, "Volume": 1}
+    assert report["fixes"]["imputed"] == {"Open": 3}
+    assert (corrected[NUMERICAL_COLS] >= 0).all().all()
+    assert list(changes["Open"]) == [3, 5, 17, 40, 41]
+    assert report["revalidation"]["rows_still_failing"] == 0
+    assert_revalidated(report, corrected)
+
+
+def test_changed_row_colliding_with_untouched_row_is_counted():
+    df = make_frame()
+    df.loc[[1, 2, 3], "Open"] = [10.0, 20.0, 30.0]
+    df.loc[[4, 5], "Open"] = np.nan
+    # Row 6 equals row 4 once row 4 is imputed; row 6 itself is never touched.
+    # Its Open is the median of the other values, so adding it keeps the median.
+    df.loc[6] = df.loc[4]
+    df.loc[6, "Open"] = df["Open"].median()
+
+    report, corrected, _ = run(df)
+
+    assert report["fixes"]["imputed"] == {"Open": 2}
+    assert corrected.duplicated().sum() == 1
+    assert report["revalidation"]["rows_still_failing"] == 1
+    assert_revalidated(report, corrected)
+
+
+def test_clipped_row_duplicating_untouched_row_is_dropped():
+    df = make_frame()
+    df.loc[7] = df.loc[9]
+    df.loc[7, "Close"] = -3.0
+    df.loc[9, "Close"] = 0.0
+
+    report, corrected, _ = run(df)
+
+    assert report["rows_dropped"] == 1
+    assert corrected.duplicated().sum() == 0
+    assert_revalidated(report, corrected)
+
+
+def test_rows_that_only_hash_alike_are_kept():
+    df = pd.DataFrame({"a": np.array([1, "1", None, "None"], dtype=object), "b": [1.0, 1.0, 2.0, 2.0]})
+    assert df.duplicated().sum() == 0
+
+    report, corrected, _ = auto_correct(df, calculate_quality_metrics(df), ["b"])
+
+    assert report["rows_dropped"] == 0
+    assert len(corrected.frame()) == 4
+    assert_revalidated(report, corrected.frame())
+
+
+def test_nullable_numeric_columns():
+    df = make_frame(40)
+    df["Open"] = df["Open"].astype("Float64")
+    df["Volume"] = df["Volume"].astype("Int64")
+    df.loc[[1, 2], "Open"] = pd.NA
+    df.loc[[3], "Open"] = -1.5
+    df.loc[[4, 5], "Volume"] = pd.NA
+    df.loc[[6], "Volume"] = -7
+
+    report, corrected, _ = run(df)
+
+    assert report["fixes"]["clipped"] == {"Open": 1, "Volume": 1}
+    assert report["fixes"]["imputed"] == {"Open": 2, "Volume": 2}
+    assert corrected["Open"].dtype == "Float64" and corrected["Volume"].dtype == "Int64"
+    assert corrected.loc[6, "Volume"] == 0 and corrected["Volume"].notna().all()
+    assert_revalidated(report, corrected)
+
+
+def test_nulls_left_in_nullable_columns_are_not_valid_numbers():
+    df = make_frame(20)
+    df["Volume"] = df["Volume"].astype("Int64")
+    df.loc[[2, 3], "Volume"] = pd.NA
+
+    report, corrected, _ = run(df, {"impute_columns": ["Open"]})
+
+    assert report["fixes"]["left_null"] == {"Volume": 2}
+    assert report["revalidation"]["metrics_after"]["numeric_validity"] < 1
+    assert_revalidated(report, corrected)
+
+
+def test_merge_duplicates_on_keys():
+    df = make_frame(n=40)
+    dup = df.iloc[[2, 3]].copy()
+    df.loc[[2, 3], "Open"] = np.nan
+    df = pd.concat([df, dup], ignore_index=True)
+
+    report, corrected, _ = run(df, {"duplicate_strategy": "merge", "duplicate_keys": ["Date", "Symbol"]})
+
+    assert report["fixes"]["merged"] == {"Open": 2}
+    assert report["fixes"]["imputed"] == {}
+    assert report["rows_dropped"] == 2
+    assert corrected.loc[[2, 3], "Open"].tolist() == dup["Open"].tolist()
+    assert_revalidated(report, corrected)
+
+
+def test_drop_duplicates_on_keys():
+    df = make_frame(n=40)
+    extra = df.iloc[[0, 1]].copy()
+    extra["Volume"] = [1, 2]
+    df = pd.concat([df, extra], ignore_index=True)
+
+    report, corrected, _ = run(df, {"duplicate_keys": ["Date", "Symbol"]})
+
+    assert report["rows_dropped"] == 2
+    assert not corrected.duplicated(["Date", "Symbol"]).any()
+    assert_revalidated(report, corrected)
+
+
+def test_coercion_followed_by_imputation():
+    df = make_frame()
+    df["Close"] = df["Close"].astype(str).astype(object)
+    df.loc[[4, 12], "Close"] = "n/a"
+    df.loc[[20], "Close"] = "-7.5"
+
+    report, corrected, _ = run(df)
+
+    assert report["fixes"]["coerced"] == {"Close": 2}
+    assert report["fixes"]["clipped"] == {"Close": 1}
+    assert report["fixes"]["imputed"] == {"Close": 2}
+    assert pd.api.types.is_float_dtype(corrected["Close"])
+    assert corrected["Close"].notna().all()
+    assert_revalidated(report, corrected)
+
+
+def test_dates_and_identifiers_are_never_imputed():
+    df = make_frame()
+    df.loc[3, "Date"] = pd.NaT
+    df.loc[4, "Symbol"] = None
+    df.loc[5, "Open"] = np.nan
+
+    report, corrected, _ = run(df)
+
+    assert report["fixes"]["imputed"] == {"Open": 1}
+    assert report["fixes"]["left_null"] == {"Date": 1, "Symbol": 1}
+    assert pd.isna(corrected.loc[3, "Date"])
+    assert pd.isna(corrected.loc[4, "Symbol"])
+    assert_revalidated(report, corrected)
+
+
+def test_numeric_nulls_are_imputed_per_group():
+    df = make_frame(40)
+    level = df["Symbol"].map({"AAPL": 1.0, "MSFT": 10.0, "GOOG": 100.0, "AMZN": 1000.0})
+    df["Open"] = (df["Open"] * level).round(2)
+    df["Volume"] = df["Volume"].astype("Int64")
+    df.loc[[0, 1, 2], "Open"] = np.nan  # AAPL, MSFT, GOOG
+    df.loc[df["Symbol"] == "GOOG", "Volume"] = pd.NA  # no GOOG volume to fill from
+    df.loc[df.index[-1], "Symbol"] = None
+    df.loc[df.index[-1], "Open"] = np.nan  # no group to fill from
+
+    report, corrected, _ = run(df, {"impute_group": "Symbol"})
+
+    for pos in [0, 1, 2]:
+        same = (df["Symbol"] == df.loc[pos, "Symbol"]) & df["Open"].notna()
+        assert corrected.loc[pos, "Open"] == df.loc[same, "Open"].median()
+    assert report["fixes"]["imputed"] == {"Open": 3}
+    assert report["fixes"]["left_null"] == {"Symbol": 1, "Open": 1, "Volume": 10}
+    assert corrected.loc[df["Symbol"] == "GOOG", "Volume"].isna().all()
+    assert_revalidated(report, corrected)
+
+
+def test_missing_group_column_falls_back_to_pooled_fills():
+    df = make_frame(20).drop(columns="Symbol")
+    df.loc[3, "Open"] = np.nan
+    report, corrected, _ = run(df, {"impute_group": "Symbol"})
+    assert corrected.loc[3, "Open"] == df["Open"].median()
+
+
+def test_impute_columns_can_be_configured():
+    df = make_frame()
+    df.loc[4, "Symbol"] = None
+    df.loc[5, "Open"] = np.nan
+
+    report, corrected, _ = run(df, {"impute_columns": ["Symbol"]})
+
+    assert report["fixes"]["imputed"] == {"Symbol": 1}
+    assert report["fixes"]["left_null"] == {"Open": 1}
+    assert corrected.loc[4, "Symbol"] in {"AAPL", "MSFT", "GOOG", "AMZN"}
+    assert_revalidated(report, corrected)
+
+
+def test_clean_frame_is_left_alone():
+    df = make_frame()
+    report, corrected, changes = run(df)
+    assert report["rows_changed"] == 0 and report["rows_dropped"] == 0
+    assert changes == {}
+    pd.testing.assert_frame_equal(corrected, df)
+
+
+@pytest.mark.parametrize("n_rows", [1_000_000])
+def test_correction_throughput(n_rows):
+    """Correct and revalidate a large batch: ~0.6s per million rows here, budget 2s."""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "Date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1500, n_rows), unit="D"),
+        "Symbol": np.array([f"T{i}" for i in range(500)], dtype=object)[rng.integers(0, 500, n_rows)],
+        "Open": rng.normal(100, 30, n_rows),
+        "Close": rng.normal(100, 30, n_rows),
+        "Volume": rng.integers(-10, 1_000_000, n_rows),
+    })
+    df.loc[rng.integers(0, n_rows, 1_000), "Open"] = np.nan
+    df = pd.concat([df, df.iloc[:1_000]], ignore_index=True)
+    quality_report = calculate_quality_metrics(df)
+
+    start = time.perf_counter()
+    report, _, _ = auto_correct(df, quality_report, NUMERICAL_COLS)
+    elapsed = time.perf_counter() - start
+
+    assert report["rows_dropped"] == 1_000
+    assert report["revalidation"]["metrics_after"]["numeric_validity"] == 1.0
+    assert elapsed < 2.0 * n_rows / 1_000_000
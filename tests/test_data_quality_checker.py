@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from src.quality.data_quality_checker import calculate_quality_metrics
+from src.quality.drift_detector import windowed_drift_statistics
+
+
+def test_metrics_match_pandas():
+    df = pd.DataFrame({"a": [1.0, -1.0, np.nan, 1.0], "b": ["x", "y", "z", "x"]})
+    metrics = calculate_quality_metrics(df)
+    assert metrics == {
+        "completeness": round(1 - df.isnull().sum().sum() / df.size, 3),
+        "uniqueness": round(1 - df.duplicated().sum() / len(df), 3),
+        "numeric_validity": round((df.select_dtypes("number") >= 0).mean().mean(), 3),
+    }
+
+
+def test_rows_that_only_hash_alike_are_unique():
+    df = pd.DataFrame({"a": np.array([1, "1", None, "None"], dtype=object), "b": [1.0, 1.0, 2.0, 2.0]})
+    assert calculate_quality_metrics(df)["uniqueness"] == 1.0
+
+
+def test_empty_frame_gives_nan_metrics():
+    for df in (pd.DataFrame(), pd.DataFrame({"Close": pd.Series([], dtype=float)})):
+        assert all(np.isnan(value) for value in calculate_quality_metrics(df).values())
+    assert windowed_drift_statistics(pd.DataFrame(), ["Close"]).empty
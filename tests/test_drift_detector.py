@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+
+from src.quality.drift_detector import (
+    _ks_2samp,
+    drift_statistics,
+    drift_verdicts,
+    summarize_windowed_drift,
+    windowed_drift,
+    windowed_drift_statistics,
+    windowed_drift_verdicts,
+)
+
+
+def daily_frame(rows_per_day, days=200, shift_from=None, seed=0):
+    rng = np.random.default_rng(seed)
+    day = np.repeat(np.arange(days), rows_per_day)
+    values = rng.normal(100, 10, len(day))
+    if shift_from is not None:
+        values[day >= shift_from] += 15
+    return pd.DataFrame({"Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(day, unit="D"), "Close": values})
+
+
+def test_large_sample_ks_matches_scipy():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(0, 1, 30_000), rng.normal(0.02, 1, 20_000)
+    stat, p = _ks_2samp(a, b)
+    expected = ks_2samp(a, b, method="asymp")
+    assert stat == pytest.approx(expected.statistic)
+    assert p == pytest.approx(expected.pvalue, rel=1e-3)
+
+
+def test_drift_statistics_and_verdicts():
+    current, reference = daily_frame(50, days=20, shift_from=0), daily_frame(50, days=20, seed=1)
+    stats = drift_statistics(current, reference, ["Close", "Missing"])
+    assert stats["Missing"] is None
+    report = drift_verdicts(stats, 0.05)
+    assert "Drift" in report["Close"] and report["Missing"] == "N/A"
+
+
+def test_window_counts_match_the_rows_in_each_window():
+    df = daily_frame(3, days=120)
+    series = windowed_drift_statistics(df, ["Close"], window_days=7, reference_days=30)
+    assert "drift" not in series
+    assert len(series) == 120 - 37 + 1
+    assert (series["n_current"] == 21).all() and (series["n_reference"] == 90).all()
+
+
+def test_verdicts_are_applied_after_the_statistics():
+    df = daily_frame(300, shift_from=150)
+    series = windowed_drift_statistics(df, ["Close"], window_days=7, reference_days=90)
+    strict, loose = windowed_drift_verdicts(series, 1e-9), windowed_drift_verdicts(series, 0.5)
+    assert strict["drift"].sum() <= loose["drift"].sum()
+    pd.testing.assert_frame_equal(windowed_drift(df, ["Close"], p_value_threshold=1e-9), strict)
+
+    summary = summarize_windowed_drift(strict)
+    assert summary["Close"]["windows"] == len(series)
+    assert strict.loc[strict["window_end"] == pd.Timestamp("2024-01-01") + pd.Timedelta(days=152), "drift"].all()
+
+
+def test_psi_is_smoothed_and_blank_for_small_windows():
+    small = windowed_drift_statistics(daily_frame(5), ["Close"], window_days=7, reference_days=90)
+    assert small["psi"].isna().all()
+
+    stable = windowed_drift_statistics(daily_frame(300), ["Close"], window_days=7, reference_days=90)
+    assert stable["psi"].max() < 0.1
+
+    drifted = windowed_drift_statistics(daily_frame(300, shift_from=150), ["Close"], window_days=7, reference_days=90)
+    assert drifted["psi"].max() > 0.25
+    assert np.isfinite(drifted["psi"]).all()
+
+
+def test_per_group_series():
+    df = pd.concat([daily_frame(20).assign(Symbol="A"), daily_frame(20, shift_from=150, seed=2).assign(Symbol="B")])
+    series = windowed_drift(df, ["Close"], group_col="Symbol", p_value_threshold=0.001)
+    summary = summarize_windowed_drift(series)
+    assert set(summary) == {"A:Close", "B:Close"}
+    assert summary["B:Close"]["drifted_windows"] > summary["A:Close"]["drifted_windows"]
+
+
+def test_per_group_edges_follow_each_tickers_price_level():
+    rng = np.random.default_rng(3)
+    days, per_day = 200, 5
+    frames = []
+    for i, level in enumerate(np.geomspace(5, 3000, 40)):
+        day = np.repeat(np.arange(days), per_day)
+        values = level * (1 + rng.normal(0, 0.01, len(day)))
+        if i == 7:
+            values[day >= days - 10] *= 1.10
+        frames.append(pd.DataFrame({
+            "Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(day, unit="D"),
+            "Symbol": f"T{i}",
+            "Close": values,
+        }))
+    df = pd.concat(frames, ignore_index=True)
+
+    series = windowed_drift(df, ["Close"], window_days=7, reference_days=90, group_col="Symbol")
+    last = series[series["window_end"] == series["window_end"].max()].set_index("group")
+    shifted = df[(df["Symbol"] == "T7")]
+    day = (shifted["Date"] - shifted["Date"].min()).dt.days
+    expected = ks_2samp(shifted.loc[day >= days - 7, "Close"], shifted.loc[(day >= days - 97) & (day < days - 7), "Close"])
+
+    assert last.loc["T7", "drift"] and last.loc["T7", "p_value"] < 1e-10
+    assert last.loc["T7", "ks_statistic"] == pytest.approx(expected.statistic, abs=0.05)
+    assert not last.drop(index="T7")["drift"].any()
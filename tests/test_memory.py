@@ -0,0 +1,84 @@
+"""Peak traced memory of each stage (and of the whole pipeline) must stay under
+PEAK_RATIO times the size of the input frame."""
+import gc
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agent.auto_corrector import auto_correct
+from src.quality.anomaly_detector import detect_anomalies
+from src.quality.data_quality_checker import calculate_quality_metrics
+from src.quality.drift_detector import drift_statistics, windowed_drift_statistics
+from src.utils.result_cache import fingerprint_frame
+
+PEAK_RATIO = 1.5
+N_ROWS = 1_000_000
+NUMERICAL_COLS = ["Open", "Close", "Volume"]
+# As in config/thresholds.yaml: nulls filled per ticker
+CORRECTION_CFG = {"impute_group": "Symbol"}
+
+
+@pytest.fixture(scope="module")
+def traced():
+    """sp500-shaped frame with nulls, negatives and duplicates, built under tracemalloc."""
+    tracemalloc.start()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1_500, N_ROWS), unit="D"),
+        "Symbol": pd.Series(rng.choice([f"T{i}" for i in range(500)], N_ROWS)),
+        **{col: rng.normal(100, 30, N_ROWS) for col in ["Adj Close", "Open", "High", "Low", "Close"]},
+        "Volume": rng.integers(-10, 1_000_000, N_ROWS),
+    })
+    df.loc[rng.integers(0, N_ROWS, 1_000), "Open"] = np.nan
+    df = pd.concat([df, df.iloc[:1_000]], ignore_index=True)
+    reference = df.iloc[:50_000].copy()
+    quality = calculate_quality_metrics(df)
+    gc.collect()
+    input_bytes = tracemalloc.get_traced_memory()[0]
+    # The corrected overlay shares the input's buffers; only its sparse patches are new
+    corrected = auto_correct(df, quality, NUMERICAL_COLS, CORRECTION_CFG)[1]
+    yield df, reference, quality, corrected, input_bytes
+    tracemalloc.stop()
+
+
+def peak_ratio(input_bytes, func):
+    gc.collect()
+    tracemalloc.reset_peak()
+    func()
+    return tracemalloc.get_traced_memory()[1] / input_bytes
+
+
+STAGES = {
+    "fingerprint": lambda df, ref, quality, fixed: fingerprint_frame(df),
+    "quality": lambda df, ref, quality, fixed: calculate_quality_metrics(df),
+    "auto_correct": lambda df, ref, quality, fixed: auto_correct(df, quality, NUMERICAL_COLS, CORRECTION_CFG),
+    "drift": lambda df, ref, quality, fixed: drift_statistics(fixed, ref, NUMERICAL_COLS),
+    "windowed_drift": lambda df, ref, quality, fixed: windowed_drift_statistics(fixed, NUMERICAL_COLS),
+    "anomalies": lambda df, ref, quality, fixed: detect_anomalies(fixed, NUMERICAL_COLS),
+}
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage_peak_memory(traced, stage):
+    df, reference, quality, fixed, input_bytes = traced
+    assert peak_ratio(input_bytes, lambda: STAGES[stage](df, reference, quality, fixed)) <= PEAK_RATIO
+
+
+def test_pipeline_peak_memory(traced):
+    """Stages run in main.py's order, each result held until the end like main() does."""
+    df, reference, quality, _, input_bytes = traced
+
+    def pipeline():
+        results = [fingerprint_frame(df), calculate_quality_metrics(df)]
+        report, corrected_input, changes = auto_correct(df, results[1], NUMERICAL_COLS, CORRECTION_CFG)
+        results += [
+            report, changes,
+            drift_statistics(corrected_input, reference, NUMERICAL_COLS),
+            windowed_drift_statistics(corrected_input, NUMERICAL_COLS),
+            detect_anomalies(corrected_input, NUMERICAL_COLS),
+        ]
+        return results
+
+    assert peak_ratio(input_bytes, pipeline) <= PEAK_RATIO
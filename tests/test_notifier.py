@@ -0,0 +1,192 @@
+import threading
+import time
+
+import pytest
+
+from src.agent.notifier import AlertDispatcher, _RateLimiter, format_digest
+from src.agent.stub_alert_server import start_stub_smtp, start_stub_webhook
+
+
+@pytest.fixture
+def webhook():
+    servers = []
+
+    def start(**kwargs):
+        server, url = start_stub_webhook(**kwargs)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def webhook_dispatcher(url, **cfg):
+    return AlertDispatcher({"channels": ["webhook"], "slack_webhook": url, "batch_interval_seconds": 60,
+                            "retry_backoff_seconds": 0.01, **cfg})
+
+
+def test_identical_alerts_are_coalesced_into_one_digest(webhook):
+    server, url = webhook()
+    dispatcher = webhook_dispatcher(url)
+    for _ in range(5):
+        dispatcher.submit("Drift detected in Open.", "Medium")
+    dispatcher.submit("Completeness below threshold!", "High")
+    report = dispatcher.close()
+
+    assert report["deduplicated"] == 4
+    assert report["messages_sent"] == 1 and report["alerts_delivered"] == 2
+    assert server.received == [format_digest([
+        {"summary": "Drift detected in Open.", "impact": "Medium", "count": 5},
+        {"summary": "Completeness below threshold!", "impact": "High", "count": 1},
+    ])]
+
+
+def test_rate_limiter_token_bucket():
+    limiter = _RateLimiter(per_minute=2)
+    assert [limiter.try_acquire() for _ in range(3)] == [True, True, False]
+    limiter.updated -= 30  # half a minute refills one token
+    assert limiter.try_acquire() and not limiter.try_acquire()
+
+
+def test_channel_rate_limit_holds_digests_until_close(webhook):
+    server, url = webhook()
+    dispatcher = webhook_dispatcher(url, batch_interval_seconds=0.05, max_batch_size=1,
+                                    rate_limit_per_minute={"webhook": 1})
+    for i in range(3):
+        dispatcher.submit(f"alert {i}")
+    time.sleep(0.4)
+    assert len(server.received) == 1
+
+    # The final flush still honours the rate limit, so the rest cannot go out in time
+    report = dispatcher.close(timeout=0.3)
+    assert len(server.received) == 1
+    assert report["alerts_delivered"] == 1 and report["abandoned"] == 2
+
+
+def test_final_flush_is_split_into_batches(webhook):
+    server, url = webhook()
+    dispatcher = webhook_dispatcher(url, max_batch_size=3, rate_limit_per_minute={"webhook": 600})
+    for i in range(8):
+        dispatcher.submit(f"alert {i}")
+    report = dispatcher.close()
+
+    assert [message.splitlines()[0] for message in server.received] == [
+        "[Data Quality Guardian] 3 alert(s)",
+        "[Data Quality Guardian] 3 alert(s)",
+        "[Data Quality Guardian] 2 alert(s)",
+    ]
+    assert report["messages_sent"] == 3 and report["alerts_delivered"] == 8
+
+
+def test_final_flush_waits_for_the_rate_limit(webhook):
+    server, url = webhook()
+    dispatcher = webhook_dispatcher(url, max_batch_size=1, rate_limit_per_minute={"webhook": 120})
+    dispatcher.limiters["webhook"].tokens = 0
+    dispatcher.submit("a")
+    dispatcher.submit("b")
+    start = time.monotonic()
+    report = dispatcher.close()
+
+    # 120 / minute refills one token every 0.5s
+    assert time.monotonic() - start >= 0.9
+    assert len(server.received) == 2 and report["abandoned"] == 0
+
+
+def test_failed_deliveries_are_retried(webhook):
+    server, url = webhook(fail_first=2)
+    dispatcher = webhook_dispatcher(url, batch_interval_seconds=0.05, max_retries=3)
+    dispatcher.submit("alert")
+    time.sleep(0.3)
+    report = dispatcher.close()
+
+    assert server.attempts == 3 and len(server.received) == 1
+    assert report["alerts_delivered"] == 1 and report["failed"] == 0
+
+
+def test_final_flush_caps_retries(webhook):
+    server, url = webhook(fail_first=100)
+    dispatcher = webhook_dispatcher(url, max_retries=5, final_max_retries=1)
+    dispatcher.submit("a")
+    dispatcher.submit("b")
+    report = dispatcher.close()
+
+    assert server.attempts == 2
+    assert report["failed"] == 2 and report["alerts_delivered"] == 0
+
+
+def test_alerts_left_on_timeout_are_reported_as_abandoned():
+    release = threading.Event()
+    dispatcher = AlertDispatcher({"channels": ["console"], "batch_interval_seconds": 60},
+                                 senders={"console": lambda message: release.wait(5)})
+    for i in range(3):
+        dispatcher.submit(f"alert {i}")
+    start = time.monotonic()
+    report = dispatcher.close(timeout=0.2)
+    release.set()
+
+    assert time.monotonic() - start < 1
+    assert report["abandoned"] == 3
+    assert report["alerts_delivered"] == 0 and report["failed"] == 0
+
+
+def test_full_queue_drops_without_blocking():
+    entered, release = threading.Event(), threading.Event()
+
+    def blocking_sender(message):
+        entered.set()
+        release.wait(5)
+
+    dispatcher = AlertDispatcher({"channels": ["console"], "queue_size": 2, "batch_interval_seconds": 0},
+                                 senders={"console": blocking_sender})
+    dispatcher.submit("first")
+    assert entered.wait(2)
+
+    start = time.monotonic()
+    accepted = [dispatcher.submit(f"alert {i}") for i in range(5)]
+    assert time.monotonic() - start < 0.1
+    assert accepted == [True, True, False, False, False]
+
+    release.set()
+    report = dispatcher.close()
+    assert report["dropped"] == 3 and report["submitted"] == 3
+    assert report["alerts_delivered"] == 3
+
+
+def test_latency_percentiles_are_reported(webhook):
+    server, url = webhook(delay=0.05)
+    dispatcher = webhook_dispatcher(url, batch_interval_seconds=0.01, max_batch_size=1)
+    for i in range(4):
+        dispatcher.submit(f"alert {i}")
+    report = dispatcher.close()
+
+    latency = report["latency_ms"]
+    assert report["alerts_delivered"] == 4
+    assert 50 <= latency["p50"] <= latency["p95"] <= latency["max"]
+
+
+def test_email_digest_through_smtp_stand_in():
+    server, port = start_stub_smtp(fail_first=1)
+    try:
+        dispatcher = AlertDispatcher({"channels": ["email"], "email": "team@example.com", "smtp_port": port,
+                                      "smtp_host": "127.0.0.1", "batch_interval_seconds": 60,
+                                      "retry_backoff_seconds": 0.01})
+        dispatcher.submit("Drift detected in Close.", "Medium")
+        report = dispatcher.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert report["alerts_delivered"] == 1 and server.attempts == 2
+    message = server.received[0]
+    assert message["to"] == ["team@example.com"]
+    assert "Subject: [Data Quality Guardian] 1 alert(s)" in message["data"]
+    assert "Drift detected in Close." in message["data"]
+
+
+def test_send_alert_without_dispatcher_prints(capsys):
+    from src.agent.notifier import send_alert
+
+    assert send_alert("inline", "Low")
+    assert "ALERT: inline | Impact: Low" in capsys.readouterr().out
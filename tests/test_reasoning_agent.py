@@ -0,0 +1,86 @@
+import pytest
+
+from src.agent.reasoning_agent import llm_reasoning, llm_reasoning_batch, rule_based_reasoning
+from src.agent.stub_model_server import start_stub_server
+from src.utils.result_cache import ResultCache
+
+QUALITY = {"completeness": 0.99, "uniqueness": 1.0, "numeric_validity": 1.0}
+DRIFTING = {"Open": " Drift Detected", "Close": "✅ Stable"}
+STABLE = {"Open": "✅ Stable"}
+
+
+@pytest.fixture
+def model_server():
+    servers = []
+
+    def start(delay=0.0):
+        server, url = start_stub_server(delay=delay)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(cache_dir=tmp_path)
+
+
+def cfg(url, budget=2.0):
+    return {"enabled": True, "base_url": url, "latency_budget_seconds": budget}
+
+
+def test_disabled_reasoning_uses_rule_based_summary():
+    reasoning, usage = llm_reasoning(QUALITY, DRIFTING)
+    assert reasoning == rule_based_reasoning(QUALITY, DRIFTING)
+    assert usage["model_calls"] == 0 and usage["fallbacks"] == 1
+
+
+def test_batch_sends_one_prompt_and_memoizes(model_server, cache):
+    server, url = model_server()
+    reports = {"CSV_SOURCE": (QUALITY, DRIFTING), "AAPL": ({}, STABLE)}
+
+    results, usage = llm_reasoning_batch(reports, cfg(url), cache)
+    assert server.RequestHandlerClass.requests_served == 1
+    assert usage["model_calls"] == 1 and usage["fallbacks"] == 0 and usage["prompt_tokens"] > 0
+    assert results["CSV_SOURCE"]["impact"] == "Medium"
+    assert results["AAPL"]["summary"] == "Stub analysis of AAPL: no drift."
+
+    # Unchanged reports are served from the cache; only the new ticker reaches the model
+    reports["MSFT"] = ({}, DRIFTING)
+    results, usage = llm_reasoning_batch(reports, cfg(url), cache)
+    assert server.RequestHandlerClass.requests_served == 2
+    assert usage["cache_hits"] == 2 and usage["model_calls"] == 1
+    assert results["MSFT"]["summary"] == "Stub analysis of MSFT: drift present."
+
+
+def test_cache_key_follows_prompt_changes(model_server, cache, monkeypatch):
+    server, url = model_server()
+    llm_reasoning(QUALITY, DRIFTING, cfg(url), cache)
+    llm_reasoning(QUALITY, DRIFTING, cfg(url), cache)
+    assert server.RequestHandlerClass.requests_served == 1
+
+    # Editing PROMPT_TEMPLATE / _parse_response changes the module's code version
+    monkeypatch.setattr("src.utils.result_cache.code_version", lambda func: "edited-prompt")
+    _, usage = llm_reasoning(QUALITY, DRIFTING, cfg(url), cache)
+    assert usage["cache_hits"] == 0 and server.RequestHandlerClass.requests_served == 2
+
+
+def test_timeout_falls_back_within_budget(model_server, cache):
+    server, url = model_server(delay=1.0)
+    reasoning, usage = llm_reasoning(QUALITY, DRIFTING, cfg(url, budget=0.2), cache)
+
+    assert reasoning == rule_based_reasoning(QUALITY, DRIFTING)
+    assert usage["timed_out"] and usage["fallbacks"] == 1
+    assert usage["latency_ms"] < 800
+    # Fallbacks are not memoized, so the next run asks the model again
+    assert not list(cache.cache_dir.glob("llm_reasoning-*.json"))
+
+
+def test_unreachable_model_falls_back(cache):
+    reasoning, usage = llm_reasoning(QUALITY, STABLE, cfg("http://127.0.0.1:1"), cache)
+    assert reasoning == rule_based_reasoning(QUALITY, STABLE)
+    assert usage["fallbacks"] == 1 and not usage["timed_out"]
@@ -0,0 +1,125 @@
+import importlib
+import os
+import sys
+import textwrap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.quality.data_quality_checker import calculate_quality_metrics
+from src.utils.result_cache import ResultCache, code_version, fingerprint_config, fingerprint_frame
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(cache_dir=tmp_path / "cache")
+
+
+def frame():
+    return pd.DataFrame({"Open": [1.0, 2.0, np.nan], "Symbol": ["A", "B", "C"]})
+
+
+def test_frame_fingerprint_is_stable_and_content_sensitive():
+    assert fingerprint_frame(frame()) == fingerprint_frame(frame())
+    changed = frame()
+    changed.loc[1, "Open"] = 2.5
+    assert fingerprint_frame(changed) != fingerprint_frame(frame())
+    assert fingerprint_frame(frame().astype({"Open": "float32"})) != fingerprint_frame(frame())
+    assert fingerprint_frame(None) == "none"
+
+
+def test_config_fingerprint_ignores_key_order():
+    assert fingerprint_config({"a": 1, "b": {"c": 2, "d": 3}}) == fingerprint_config({"b": {"d": 3, "c": 2}, "a": 1})
+    assert fingerprint_config({"a": 1}) != fingerprint_config({"a": 2})
+
+
+def test_key_depends_on_every_part(cache):
+    base = cache.key("quality", ["fp"], {"x": 1}, calculate_quality_metrics)
+    assert base == cache.key("quality", ["fp"], {"x": 1}, calculate_quality_metrics)
+    assert base.startswith("quality-")
+    assert base != cache.key("quality", ["other"], {"x": 1}, calculate_quality_metrics)
+    assert base != cache.key("quality", ["fp"], {"x": 2}, calculate_quality_metrics)
+    assert base != cache.key("anomaly", ["fp"], {"x": 1}, calculate_quality_metrics)
+    assert base != cache.key("quality", ["fp"], {"x": 1}, fingerprint_frame)
+
+
+def test_code_version_covers_imported_project_modules(tmp_path, monkeypatch):
+    package = tmp_path / "stagepkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "helpers.py").write_text("def helper(x):\n    return x + 1\n")
+    (package / "stage.py").write_text(textwrap.dedent("""
+        from stagepkg.helpers import helper
+
+        def stage(x):
+            return helper(x)
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    stage = importlib.import_module("stagepkg.stage")
+    try:
+        before = code_version(stage.stage)
+        assert before == code_version(stage.stage)
+        (package / "helpers.py").write_text("def helper(x):\n    return x + 2\n")
+        assert code_version(stage.stage) != before
+    finally:
+        for name in ("stagepkg", "stagepkg.stage", "stagepkg.helpers"):
+            sys.modules.pop(name, None)
+
+
+def test_run_hits_after_first_call(cache):
+    calls = []
+
+    def stage(x):
+        calls.append(x)
+        return {"value": x}
+
+    assert cache.run("demo", ["fp"], None, stage, 1) == ({"value": 1}, False)
+    assert cache.run("demo", ["fp"], None, stage, 1) == ({"value": 1}, True)
+    assert cache.run("demo", ["fp2"], None, stage, 2) == ({"value": 2}, False)
+    assert calls == [1, 2]
+
+
+def test_numpy_values_round_trip_as_json(cache):
+    key = cache.key("demo", ["fp"])
+    cache.put(key, {"rate": np.float64(0.5), "count": np.int64(3), "list": np.arange(2)})
+    assert cache.get(key) == (True, {"rate": 0.5, "count": 3, "list": [0, 1]})
+
+
+def test_invalidate_one_stage_or_all(cache):
+    for stage in ("quality", "quality", "drift"):
+        cache.put(cache.key(stage, [stage, os.urandom(4).hex()]), 1)
+    assert cache.invalidate("quality") == 2
+    assert len(list(cache.cache_dir.glob("*.json"))) == 1
+    assert cache.invalidate() == 1
+    assert not list(cache.cache_dir.glob("*.json"))
+
+
+def _age(cache, key, seconds_ago):
+    stamp = 1_700_000_000 - seconds_ago
+    os.utime(cache.cache_dir / f"{key}.json", (stamp, stamp))
+
+
+def test_lru_eviction_by_entry_count(tmp_path):
+    cache = ResultCache(cache_dir=tmp_path, max_entries=3)
+    keys = [cache.key("demo", [str(i)]) for i in range(4)]
+    for age, key in zip((40, 30, 20), keys[:3]):
+        cache.put(key, key)
+        _age(cache, key, age)
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) == (True, keys[0])
+    cache.put(keys[3], keys[3])
+
+    assert not cache.contains(keys[1])
+    assert all(cache.contains(key) for key in (keys[0], keys[2], keys[3]))
+
+
+def test_lru_eviction_by_total_size(tmp_path):
+    cache = ResultCache(cache_dir=tmp_path, max_bytes=2_500)
+    keys = [cache.key("demo", [str(i)]) for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, "x" * 1_000)
+        _age(cache, key, age)
+
+    assert not cache.contains(keys[0])
+    assert cache.contains(keys[1]) and cache.contains(keys[2])
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.agent import action_handler
+from src.agent.threshold_replay import evaluate_thresholds, replay_verdicts, search_thresholds
+from src.utils.run_history import (
+    FEEDBACK_COLUMNS,
+    FRAME_COLUMN,
+    load_feedback,
+    load_run_statistics,
+    record_feedback,
+    record_run_statistics,
+)
+
+THRESHOLDS = {"drift_detection": {"p_value_threshold": 0.05}, "data_quality": {"completeness": 0.95}}
+
+
+def stats_frame(rows):
+    return pd.DataFrame(rows, columns=["run_id", "column", "p_value", "null_rate"])
+
+
+def feedback_frame(rows):
+    return pd.DataFrame([[*row, ""] for row in rows], columns=FEEDBACK_COLUMNS)
+
+
+def test_replay_verdicts_matrix():
+    flagged = replay_verdicts([0.01, 0.2, np.nan], [0.05, 0.5], "below")
+    assert flagged.tolist() == [[True, False, False], [True, True, False]]
+    assert replay_verdicts([0.3], [0.1, 0.5], "above").tolist() == [[True], [False]]
+
+
+def test_drift_search_minimizes_feedback_cost():
+    stats = stats_frame([
+        ("r1", "Open", 0.03, 0.0),    # flagged at 0.05, but a false alarm
+        ("r1", "Close", 0.001, 0.0),  # confirmed drift
+        ("r2", "Open", 0.2, 0.0),     # missed by every threshold below 0.2
+        ("r2", "Close", 0.5, 0.0),
+    ])
+    feedback = feedback_frame([
+        ("r1", "Open", "drift", "false_alarm"),
+        ("r1", "Close", "drift", "confirmed"),
+    ])
+
+    scores = evaluate_thresholds(stats, feedback, "drift", candidates=[0.01, 0.05])
+    assert scores["false_alarms"].tolist() == [0, 1]
+    assert scores["missed"].tolist() == [0, 0]
+
+    result = search_thresholds(THRESHOLDS, stats, feedback, checks=["drift"])["drift"]
+    assert 0.001 < result["best"] <= 0.03
+    assert result["false_alarms"] == 0 and result["missed"] == 0
+    assert result["labelled_runs"] == 2
+
+
+def test_search_keeps_current_threshold_on_ties():
+    stats = stats_frame([("r1", "Open", 0.001, 0.0)])
+    feedback = feedback_frame([("r1", "Open", "drift", "confirmed")])
+    result = search_thresholds(THRESHOLDS, stats, feedback, checks=["drift"],
+                               candidates={"drift": [0.01, 0.05, 0.1]})["drift"]
+    assert result["best"] == 0.05
+
+
+def test_completeness_replays_whole_frame_statistic():
+    stats = stats_frame([
+        ("r1", "Open", None, 0.4),         # per-column null rates are not the live statistic
+        ("r1", FRAME_COLUMN, None, 0.03),  # frame completeness 0.97 passed the live check
+    ])
+    feedback = feedback_frame([("r1", FRAME_COLUMN, "completeness", "missed_drift")])
+
+    scores = evaluate_thresholds(stats, feedback, "completeness", candidates=[0.95, 0.98])
+    assert scores["flags"].tolist() == [0, 1]
+    assert scores["missed"].tolist() == [1, 0]
+    assert search_thresholds(THRESHOLDS, stats, feedback, checks=["completeness"])["completeness"]["best"] > 0.97
+
+
+def test_no_feedback_keeps_thresholds():
+    stats = stats_frame([("r1", "Open", 0.01, 0.0)])
+    results = search_thresholds(THRESHOLDS, stats, feedback_frame([]))
+    assert results["drift"]["best"] == 0.05
+    assert results["completeness"]["best"] == 0.95
+
+
+def test_run_statistics_round_trip(tmp_path):
+    stats_path, feedback_path = tmp_path / "stats.csv", tmp_path / "feedback.csv"
+    record_run_statistics("r1", {"Open": {"p_value": 0.2, "ks_statistic": 0.1}},
+                          {"Open": {"percentage": 5.0}}, {"Open": 0.01}, 0.98, path=stats_path)
+    record_feedback("r1", "Open", "false_alarm", path=feedback_path)
+    with pytest.raises(ValueError):
+        record_feedback("r1", "Open", "maybe", path=feedback_path)
+
+    stats = load_run_statistics(stats_path)
+    assert stats["column"].tolist() == ["Open", FRAME_COLUMN]
+    assert stats.loc[0, "anomaly_rate"] == 0.05
+    assert stats.loc[1, "null_rate"] == pytest.approx(0.02)
+    assert load_feedback(feedback_path)["feedback"].tolist() == ["false_alarm"]
+
+
+def test_write_thresholds_keeps_comments(tmp_path):
+    path = tmp_path / "thresholds.yaml"
+    path.write_text(
+        "data_quality:\n  completeness: 0.95      # Minimum\n"
+        "drift_detection:\n  p_value_threshold: 0.05  # KS\n  windowed:\n    enabled: true\n"
+    )
+    action_handler.write_thresholds({("drift_detection", "p_value_threshold"): 0.01}, path)
+    text = path.read_text()
+    assert "  p_value_threshold: 0.01  # KS\n" in text
+    assert "completeness: 0.95      # Minimum" in text
+    with pytest.raises(KeyError):
+        action_handler.write_thresholds({("drift_detection", "missing"): 1}, path)
+
+
+def test_cli_records_feedback_and_writes_tuned_thresholds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = tmp_path / "thresholds.yaml"
+    config.write_text(
+        "data_quality:\n  completeness: 0.95\n"
+        "drift_detection:\n  p_value_threshold: 0.05  # Significance level\n"
+    )
+    record_run_statistics("r1", {"Open": {"p_value": 0.03, "ks_statistic": 0.1}}, {}, {}, 0.99)
+
+    action_handler.main(["feedback", "r1", "false_alarm", "--column", "Open"])
+    action_handler.main(["tune", "--config", str(config)])
+    assert yaml.safe_load(config.read_text())["drift_detection"]["p_value_threshold"] == 0.05
+
+    action_handler.main(["tune", "--config", str(config), "--write"])
+    tuned = yaml.safe_load(config.read_text())
+    assert tuned["drift_detection"]["p_value_threshold"] <= 0.03
+    assert tuned["data_quality"]["completeness"] == 0.95
+    assert "# Significance level" in config.read_text()
+
+
+def test_cli_requires_column_for_drift_feedback(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit):
+        action_handler.main(["feedback", "r1", "confirmed"])
+    action_handler.main(["feedback", "r1", "confirmed", "--check", "completeness"])
+    assert load_feedback()["column"].tolist() == [FRAME_COLUMN]